@@ -0,0 +1,44 @@
+"""add src_ip to alerts
+
+Revision ID: 3f1c2a9b7d10
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables are created by create_database() on startup, so only add what an existing database is missing
+    inspector = sa.inspect(op.get_bind())
+    if 'alerts' not in inspector.get_table_names():
+        return
+    
+    columns = {column['name'] for column in inspector.get_columns('alerts')}
+    indexes = {index['name'] for index in inspector.get_indexes('alerts')}
+    
+    if 'src_ip' not in columns:
+        op.add_column('alerts', sa.Column('src_ip', sa.String(length=64), nullable=True))
+    if 'ix_alerts_src_ip' not in indexes:
+        op.create_index('ix_alerts_src_ip', 'alerts', ['src_ip'])
+    if 'ix_alerts_level_text' not in indexes:
+        op.create_index('ix_alerts_level_text', 'alerts', ['level_text'])
+    if 'ix_alerts_timestamp_level_text' not in indexes:
+        op.create_index('ix_alerts_timestamp_level_text', 'alerts', ['timestamp', 'level_text'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_timestamp_level_text', table_name='alerts')
+    op.drop_index('ix_alerts_level_text', table_name='alerts')
+    op.drop_index('ix_alerts_src_ip', table_name='alerts')
+    op.drop_column('alerts', 'src_ip')
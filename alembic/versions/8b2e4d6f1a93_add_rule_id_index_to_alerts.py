@@ -0,0 +1,35 @@
+"""add rule_id index to alerts
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a93'
+down_revision: Union[str, None] = '3f1c2a9b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables are created by create_database() on startup, so only add what an existing database is missing
+    inspector = sa.inspect(op.get_bind())
+    if 'alerts' not in inspector.get_table_names():
+        return
+    
+    indexes = {index['name'] for index in inspector.get_indexes('alerts')}
+    
+    # Alerts are filtered by the rule ids of a rule group
+    if 'ix_alerts_rule_id' not in indexes:
+        op.create_index('ix_alerts_rule_id', 'alerts', ['rule_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_rule_id', table_name='alerts')
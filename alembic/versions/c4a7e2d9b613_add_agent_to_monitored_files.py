@@ -0,0 +1,85 @@
+"""add agent to monitored_files
+
+Revision ID: c4a7e2d9b613
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d9b613'
+down_revision: Union[str, None] = '8b2e4d6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, path, status, size, mode, uid, gid, md5, sha1, inode, last_check'
+
+
+def upgrade() -> None:
+    # Tables are created by create_database() on startup, so only add what an existing database is missing
+    inspector = sa.inspect(op.get_bind())
+    if 'monitored_files' not in inspector.get_table_names():
+        return
+
+    columns = {column['name'] for column in inspector.get_columns('monitored_files')}
+    if 'agent' in columns:
+        return
+
+    # SQLite cannot drop the unique constraint on path, the table is rebuilt keeping its ids,
+    # which the change history and verifications point to. The trigram path index is rebuilt on first use.
+    op.execute('DROP TRIGGER IF EXISTS monitored_files_fts_delete')
+    op.execute('DROP TRIGGER IF EXISTS monitored_files_fts_update')
+    op.execute('DROP TABLE IF EXISTS monitored_files_fts')
+    op.execute('ALTER TABLE monitored_files RENAME TO monitored_files_old')
+    op.drop_index('ix_monitored_files_status', table_name='monitored_files_old')
+
+    op.create_table(
+        'monitored_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('agent', sa.String(length=128), nullable=False, server_default='local'),
+        sa.Column('path', sa.String(length=4096), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('mode', sa.Integer(), nullable=True),
+        sa.Column('uid', sa.Integer(), nullable=True),
+        sa.Column('gid', sa.Integer(), nullable=True),
+        sa.Column('md5', sa.String(length=32), nullable=True),
+        sa.Column('sha1', sa.String(length=40), nullable=True),
+        sa.Column('inode', sa.BigInteger(), nullable=True),
+        sa.Column('last_check', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.execute(f"INSERT INTO monitored_files ({COLUMNS}) SELECT {COLUMNS} FROM monitored_files_old")
+    op.drop_table('monitored_files_old')
+
+    # Ids of files dropped before the rebuild may still be referenced by the change history, they are not handed out again
+    if 'monitored_file_changes' in inspector.get_table_names():
+        op.execute("DELETE FROM sqlite_sequence WHERE name = 'monitored_files'")
+        op.execute(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'monitored_files', MAX("
+            "(SELECT COALESCE(MAX(id), 0) FROM monitored_files), "
+            "(SELECT COALESCE(MAX(file_id), 0) FROM monitored_file_changes))"
+        )
+
+    op.create_index('ux_monitored_files_agent_path', 'monitored_files', ['agent', 'path'], unique=True)
+    op.create_index('ix_monitored_files_path', 'monitored_files', ['path'])
+    op.create_index('ix_monitored_files_status', 'monitored_files', ['status'])
+
+
+def downgrade() -> None:
+    # Only the manager's own entries fit the single-agent table
+    op.execute('DROP TRIGGER IF EXISTS monitored_files_fts_delete')
+    op.execute('DROP TRIGGER IF EXISTS monitored_files_fts_update')
+    op.execute('DROP TABLE IF EXISTS monitored_files_fts')
+    op.execute("DELETE FROM monitored_files WHERE agent != 'local'")
+    op.drop_index('ux_monitored_files_agent_path', table_name='monitored_files')
+    op.drop_index('ix_monitored_files_path', table_name='monitored_files')
+    with op.batch_alter_table('monitored_files') as batch_op:
+        batch_op.drop_column('agent')
+        batch_op.create_unique_constraint('uq_monitored_files_path', ['path'])
@@ -1,18 +1,61 @@
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 import sqlalchemy as sa
+from sqlalchemy import event
 from sqlalchemy.orm import Session, class_mapper
 from uuid import uuid4
 from fastapi import HTTPException
-from sqlalchemy.ext.hybrid import hybrid_property
-from inspect import getmembers
+from sqlalchemy.ext.hybrid import HybridExtensionType
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from api.db.database import Base
 from api.utils.loggers import create_logger
+from api.utils.query_cache import query_cache
 
 
 logger = create_logger(__name__)
 
+
+class SerializerPlan(NamedTuple):
+    """Per-class description of what `to_dict` needs to serialize"""
+    
+    columns: Tuple[str, ...]
+    isoformat_columns: Tuple[str, ...]
+    hybrids: Tuple[str, ...]
+
+
+# Columns that are never part of the serialized output
+SERIALIZER_EXCLUDED_COLUMNS = {"is_deleted"}
+
+# Datetime columns that are serialized as ISO strings
+SERIALIZER_ISOFORMAT_COLUMNS = ("created_at", "updated_at")
+
+
+def _build_serializer_plan(mapper, class_) -> SerializerPlan:
+    """Builds the serializer plan of a mapped class from its mapper"""
+    
+    columns = tuple(
+        attr.key for attr in mapper.column_attrs 
+        if attr.key not in SERIALIZER_EXCLUDED_COLUMNS
+    )
+    hybrids = tuple(
+        name for name, descriptor in mapper.all_orm_descriptors.items()
+        if descriptor.extension_type is HybridExtensionType.HYBRID_PROPERTY
+    )
+    plan = SerializerPlan(
+        columns=columns,
+        isoformat_columns=tuple(key for key in SERIALIZER_ISOFORMAT_COLUMNS if key in columns),
+        hybrids=hybrids,
+    )
+    class_._serializer_plan = plan
+    return plan
+
+
 class BaseTableModel(Base):
     """This model creates helper methods for all models"""
 
@@ -41,29 +84,47 @@ class BaseTableModel(Base):
 
         visited.add(self.id)
         
-        obj_dict = self.__dict__.copy()
+        plan = self._get_serializer_plan()
+        state = self.__dict__
         
-        del obj_dict["_sa_instance_state"]
-        del obj_dict["is_deleted"]
+        # Only loaded columns are serialized so deferred/unloaded ones do not trigger extra queries
+        obj_dict = {key: state[key] for key in plan.columns if key in state}
         obj_dict["id"] = self.id
         
-        if self.created_at:
-            obj_dict["created_at"] = self.created_at.isoformat()
-        if self.updated_at:
-            obj_dict["updated_at"] = self.updated_at.isoformat()
-            
-        # Get hybrid properties
-        for name, attr in getmembers(self):
-            if isinstance(attr, hybrid_property):
-                obj_dict[name] = getattr(self, name)
+        for key in plan.isoformat_columns:
+            value = obj_dict.get(key)
+            if value:
+                obj_dict[key] = value.isoformat()
+        
+        # Column-only models skip the hybrid property pass entirely
+        for name in plan.hybrids:
+            obj_dict[name] = getattr(self, name)
                 
         # Exclude specified fields
         for exclude in excludes:
-            if exclude in list(obj_dict.keys()):
-                # for exclude in excludes:
-                obj_dict.pop(exclude, None)
+            obj_dict.pop(exclude, None)
             
         return obj_dict
+    
+    
+    def to_json(self, excludes: List[str] = []) -> bytes:
+        """Returns a JSON encoded representation of the instance. Uses orjson when it is installed."""
+        
+        obj_dict = self.to_dict(excludes=excludes)
+        
+        if orjson is not None:
+            return orjson.dumps(obj_dict, default=str)
+        return json.dumps(obj_dict, default=str).encode()
+    
+    
+    @classmethod
+    def _get_serializer_plan(cls) -> SerializerPlan:
+        """Returns the cached serializer plan for the model, building it if the mapper has not been configured yet"""
+        
+        plan = cls.__dict__.get("_serializer_plan")
+        if plan is None:
+            plan = _build_serializer_plan(sa.inspect(cls), cls)
+        return plan
 
 
     @classmethod
@@ -86,11 +147,18 @@ class BaseTableModel(Base):
         sort_by: str = "created_at",
         order: str = "desc",
         show_deleted: bool = False,
-        search_fields: Optional[Dict[str, Any]] = None
+        search_fields: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[Any]] = None,
+        cache: bool = False
     ):
-        """Fetches all instances with pagination and sorting"""
+        """Fetches all instances with pagination and sorting.\n
+        If `columns` is given only those columns are loaded and lightweight rows are returned instead of model instances.\n
+        Set `cache` to serve identical projected queries from the query result cache.
+        """
         
-        query = db.query(cls).filter_by(is_deleted=False) if not show_deleted else db.query(cls)
+        query = cls._base_query(db, columns)
+        if not show_deleted:
+            query = query.filter(cls.is_deleted == False)
 
         # Handle sorting
         if order == "desc":
@@ -105,13 +173,62 @@ class BaseTableModel(Base):
             for field, value in filtered_fields.items():
                 query = query.filter(getattr(cls, field).ilike(f"%{value}%"))
             
-        count = query.count()
-
         # Handle pagination
         offset = (page - 1) * per_page
-        return query, query.offset(offset).limit(per_page).all(), count
+        items, count = cls._fetch_results(query, offset=offset, limit=per_page, cache=cache, columns=columns)
+        return query, items, count
          
     
+    @classmethod
+    def _base_query(cls, db: Session, columns: Optional[List[Any]] = None):
+        """Builds the base query of the fetch helpers, optionally limited to a projection of columns"""
+        
+        if not columns:
+            return db.query(cls)
+        
+        return db.query(*[
+            getattr(cls, column) if isinstance(column, str) else column
+            for column in columns
+        ])
+    
+    
+    @classmethod
+    def _fetch_results(
+        cls, 
+        query, 
+        offset: Optional[int] = None, 
+        limit: Optional[int] = None, 
+        cache: bool = False,
+        columns: Optional[List[Any]] = None
+    ):
+        """Runs the page and count queries of the fetch helpers, going through the query result cache if requested"""
+        
+        page_query = query if limit is None else query.offset(offset).limit(limit)
+        
+        if not cache:
+            return page_query.all(), query.count()
+        
+        # ORM instances are bound to the session that loaded them, so only projected rows are shared
+        if not columns:
+            raise ValueError("The query result cache can only be used with a column projection")
+        
+        key = query_cache.make_key(cls.__tablename__, page_query)
+        result = query_cache.get(key)
+        if result is None:
+            result = (page_query.all(), query.count())
+            query_cache.set(key, result)
+        
+        items, count = result
+        return list(items), count
+    
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Invalidates all cached query results of the table. Use after writes made outside of this process."""
+        
+        query_cache.bump_table_version(cls.__tablename__)
+    
+    
     @classmethod
     def fetch_by_id(cls, db: Session, id: str, error_message: Optional[str] = None):
         """Fetches a single instance by ID. (ignores soft-deleted records).\n
@@ -189,13 +306,21 @@ class BaseTableModel(Base):
         ignore_none_kwarg: bool = True,
         paginate: bool = True,
         filter_expr=None,
+        columns: Optional[List[Any]] = None,
+        cache: bool = False,
         **kwargs
     ):
         """
         Fetches all records that match the given field(s), supporting complex SQLAlchemy filter expressions
         such as and_(), or_(), etc. via the filter_expr argument.
+        
+        Pass `columns` (column names or SQLAlchemy column expressions) to load only a projection of the table.
+        Rows are then returned as lightweight named tuples (use `row._asdict()` for a dictionary).
+        
+        Set `cache` to serve identical projected queries from the query result cache. Cached results are
+        invalidated whenever the table is written to.
         """
-        query = db.query(cls)
+        query = cls._base_query(db, columns)
 
         # Handle is_deleted logic
         if not show_deleted and hasattr(cls, "is_deleted"):
@@ -225,14 +350,13 @@ class BaseTableModel(Base):
             for field, value in filtered_fields.items():
                 query = query.filter(getattr(cls, field).ilike(f"%{value}%"))
 
-        count = query.count()
-
         # Handle pagination
-        offset = (page - 1) * per_page
         if not paginate:
-            return query, query.all(), count
+            items, count = cls._fetch_results(query, cache=cache, columns=columns)
         else:
-            return query, query.offset(offset).limit(per_page).all(), count
+            offset = (page - 1) * per_page
+            items, count = cls._fetch_results(query, offset=offset, limit=per_page, cache=cache, columns=columns)
+        return query, items, count
         
 
     @classmethod
@@ -268,6 +392,81 @@ class BaseTableModel(Base):
     
         if commit:
             db.commit()
+    
+    
+    @classmethod
+    def bulk_create(cls, db: Session, items: List[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Inserts many records with a single INSERT statement and returns the number of rows inserted.\n
+        Unlike `create`, instances are not returned or refreshed.
+        """
+        
+        if not items:
+            return 0
+        
+        db.execute(sa.insert(cls), items)
+        cls._mark_table_written(db)
+        
+        if commit:
+            db.commit()
+        return len(items)
+    
+    
+    @classmethod
+    def bulk_update(
+        cls, 
+        db: Session, 
+        filter_expr, 
+        values: Dict[str, Any], 
+        show_deleted: bool = False,
+        commit: bool = True
+    ) -> int:
+        """
+        Updates every record matching `filter_expr` with a single UPDATE statement and returns the number of rows affected.\n
+        Instances already loaded in the session are not synchronized.
+        """
+        
+        if not values:
+            return 0
+        
+        stmt = sa.update(cls).where(filter_expr)
+        if not show_deleted:
+            stmt = stmt.where(cls.is_deleted == False)
+            
+        stmt = stmt.values({"updated_at": datetime.now(timezone.utc), **values}).execution_options(synchronize_session=False)
+        
+        result = db.execute(stmt)
+        cls._mark_table_written(db)
+        
+        if commit:
+            db.commit()
+        return result.rowcount
+    
+    
+    @classmethod
+    def bulk_delete(cls, db: Session, filter_expr, soft: bool = True, commit: bool = True) -> int:
+        """
+        Deletes every record matching `filter_expr` with a single statement and returns the number of rows affected.\n
+        Soft deletes set is_deleted to True, hard deletes remove the rows.
+        """
+        
+        if soft:
+            return cls.bulk_update(db, filter_expr, {"is_deleted": True}, commit=commit)
+        
+        stmt = sa.delete(cls).where(filter_expr).execution_options(synchronize_session=False)
+        result = db.execute(stmt)
+        cls._mark_table_written(db)
+        
+        if commit:
+            db.commit()
+        return result.rowcount
+    
+    
+    @classmethod
+    def _mark_table_written(cls, db: Session):
+        """Records a write made with a bulk statement so the query cache is invalidated on commit"""
+        
+        db.info.setdefault("written_tables", set()).add(cls.__tablename__)
 
     
     @classmethod
@@ -322,3 +521,33 @@ class BaseTableModel(Base):
         # Apply pagination
         offset = (page - 1) * per_page
         return query, query.offset(offset).limit(per_page).all(), count
+
+
+@event.listens_for(BaseTableModel, "mapper_configured", propagate=True)
+def _cache_serializer_plan(mapper, class_):
+    """Computes the serializer plan of every model once, when its mapper is configured"""
+    
+    _build_serializer_plan(mapper, class_)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    """Records the tables written to in the current transaction"""
+    
+    written_tables = session.info.setdefault("written_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, BaseTableModel):
+            written_tables.add(obj.__tablename__)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session):
+    """Bumps the cache version of every table written to once the transaction is committed"""
+    
+    for table_name in session.info.pop("written_tables", ()):
+        query_cache.bump_table_version(table_name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    session.info.pop("written_tables", None)
@@ -120,9 +120,8 @@
 from fastapi import Request, HTTPException
 from fastapi.responses import RedirectResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
 
-from api.db.database import get_db_with_ctx_manager
+from api.db.database import close_request_db, get_request_db
 from api.v1.models.user import User
 from api.v1.services.auth import AuthService
 from api.core.dependencies.flash_messages import flash, MessageCategory
@@ -142,22 +141,32 @@ class AuthMiddleware(BaseHTTPMiddleware):
             "/dashboard/processes", "/dashboard/files",
             "/dashboard/users", "/dashboard/settings",
         ]
+        # Dynamic routes (e.g. /dashboard/alerts/{id}) are protected by prefix
+        self.protected_route_prefixes = [
+            "/dashboard/alerts/", "/dashboard/files/",
+        ]
+        # Static files and log streams never need the current user
+        self.public_route_prefixes = [
+            "/static/", "/tmp/media/", "/logs",
+        ]
 
     async def dispatch(self, request: Request, call_next):
         path = request.url.path
+        if any(path.startswith(prefix) for prefix in self.public_route_prefixes):
+            return await call_next(request)
+        
+        access_token = request.cookies.get("access_token")
+        refresh_token = request.cookies.get("refresh_token")
 
-        # Always open DB session
-        with get_db_with_ctx_manager() as db:
-            access_token = request.cookies.get("access_token")
-            refresh_token = request.cookies.get("refresh_token")
-
+        # The DB session is only opened when a token has to be verified and is then reused by the route
+        try:
             # 1️⃣ If user tries to access a protected page
-            if path in self.protected_routes:
+            if self._is_protected_route(path):
                 if not access_token:
                     flash(request, "Please login to access this page.", MessageCategory.ERROR)
                     return RedirectResponse(url="/auth/login", status_code=303)
                 
-                user = await self._get_user_from_token(db, access_token, refresh_token, request)
+                user = await self._get_user_from_token(access_token, refresh_token, request)
                 if not user:
                     flash(request, "Please login to access this page.", MessageCategory.ERROR)
                     return RedirectResponse(url="/auth/login", status_code=303)
@@ -166,20 +175,27 @@ class AuthMiddleware(BaseHTTPMiddleware):
 
             # 2️⃣ If user is already logged in but visits login/register → redirect to dashboard
             if path in self.unauthenticated_routes and access_token:
-                user = await self._get_user_from_token(db, access_token, refresh_token, request)
+                user = await self._get_user_from_token(access_token, refresh_token, request)
                 if user:
                     return RedirectResponse(url="/dashboard", status_code=303)
 
             # 3️⃣ For any other route (public pages, APIs)
             if access_token:
-                user = await self._get_user_from_token(db, access_token, refresh_token, request)
+                user = await self._get_user_from_token(access_token, refresh_token, request)
                 request.state.current_user = user
 
             return await call_next(request)
+        
+        finally:
+            close_request_db(request)
+
+    def _is_protected_route(self, path: str) -> bool:
+        return path in self.protected_routes or any(
+            path.startswith(prefix) for prefix in self.protected_route_prefixes
+        )
 
     async def _get_user_from_token(
         self, 
-        db: Session, 
         access_token: str, 
         refresh_token: str, 
         request: Request,
@@ -187,6 +203,8 @@ class AuthMiddleware(BaseHTTPMiddleware):
         if not access_token:
             return None
         
+        db = get_request_db(request)
+        
         credentials_exception = HTTPException(
             status_code=401,
             detail="Could not validate credentials",
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
+from starlette.requests import Request
 from sqlalchemy import create_engine
 from contextlib import contextmanager
 import os
@@ -22,12 +23,33 @@ Base = declarative_base()
 def create_database():
     return Base.metadata.create_all(bind=engine)
 
-def get_db():
-    db = db_session()
+def get_request_db(request: Request) -> Session:
+    """
+    Returns the session of the current request, opening it on first use.\n
+    AuthMiddleware and the route dependencies share this session so a request checks out at most one connection.
+    """
+    db = getattr(request.state, "db", None)
+    if db is None:
+        db = SessionLocal()
+        request.state.db = db
+    return db
+
+def close_request_db(request: Request):
+    """Closes the session of the current request if one was opened"""
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        db.close()
+        request.state.db = None
+
+def get_db(request: Request):
+    # Reuse the session opened by AuthMiddleware, which then also closes it
+    owns_session = getattr(request.state, "db", None) is None
+    db = get_request_db(request)
     try:
         yield db
     finally:
-        db.close()
+        if owns_session:
+            close_request_db(request)
 
 @contextmanager
 def get_db_with_ctx_manager():
@@ -1,6 +1,10 @@
 import asyncio
+from itertools import islice
+import os
 from typing import Optional
 
+from api.utils.reverse_reader import iter_lines_reversed
+
 
 # Async generator to yield log lines
 async def log_streamer(file_path: str, lines: Optional[int] = None):
@@ -8,20 +12,16 @@ async def log_streamer(file_path: str, lines: Optional[int] = None):
     new_lines = []
 
     with open(file_path, "r") as f:
-        # Read the entire file first and reverse the order of lines
-        all_lines = f.readlines()
+        # Lines appended from here on are streamed below
+        size = f.seek(0, os.SEEK_END)
 
         # Show only 100 lines if `lines` is None
         if lines is None:
-            all_lines = all_lines[-100:]
-        
-        # If `lines` parameter is provided, limit the number of lines to show
-        if lines is not None and lines < len(all_lines):
-            all_lines = all_lines[-lines:]  # Get the last `lines` lines
+            lines = 100
 
-        # # Yield the initial lines in reverse order (newest at the top)
-        for line in reversed(all_lines):
-            yield line
+        # Yield the last `lines` lines newest first, read backwards without loading the whole file
+        for line in islice(iter_lines_reversed(file_path, end=size), max(lines, 0)):
+            yield line + "\n"
 
         # # Continue streaming new lines appended to the file
         while True:
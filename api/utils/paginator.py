@@ -1,6 +1,9 @@
+from itertools import islice
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
+from api.utils.reverse_reader import iter_lines_reversed
+
 
 def total_row_count(model, db: Session, filters: Optional[Dict]=None):
     return model.count(
@@ -180,14 +183,11 @@ def read_file_paginated(
     limit: int = 50, 
     from_file_end: bool = True
 ):
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-        
     if from_file_end:
-        start = max(len(lines) - offset - limit, 0)
-        end = len(lines) - offset
-        return [line.strip() for line in lines[start:end]]
+        # Read backwards from the end of the file, only the requested lines are loaded
+        lines = list(islice(iter_lines_reversed(file_path, skip=offset), limit))
+        lines.reverse()
+        return [line.strip() for line in lines]
     else:
-        start = offset
-        end = offset + limit
-        return [line.strip() for line in lines[start:end]]
\ No newline at end of file
+        with open(file_path, "r") as file:
+            return [line.strip() for line in islice(file, offset, offset + limit)]
\ No newline at end of file
@@ -0,0 +1,68 @@
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+from cachetools import TTLCache
+
+from api.utils.settings import settings
+
+
+class QueryCache:
+    """
+    LRU + TTL cache for query results.\n
+    Keys embed the current version of the table being queried, so bumping a table's version
+    invalidates every cached result of that table without having to scan the cache.
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: int = 30):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._table_versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        
+    def table_version(self, table_name: str) -> int:
+        return self._table_versions.get(table_name, 0)
+    
+    def bump_table_version(self, table_name: str):
+        """Invalidates all cached results of a table"""
+        
+        with self._lock:
+            self._table_versions[table_name] = self._table_versions.get(table_name, 0) + 1
+    
+    def make_key(self, table_name: str, query) -> Tuple[Hashable, ...]:
+        """Builds a cache key from the compiled SQL and bound parameters of a query"""
+        
+        compiled = query.statement.compile()
+        params = tuple(sorted((name, repr(value)) for name, value in compiled.params.items()))
+        return (table_name, self.table_version(table_name), str(compiled), params)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._cache[key] = value
+            
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": int(self._cache.maxsize),
+            }
+
+
+query_cache = QueryCache(
+    maxsize=settings.QUERY_CACHE_MAXSIZE,
+    ttl=settings.QUERY_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,36 @@
+import mmap
+import os
+from typing import Iterator, Optional
+
+
+def iter_lines_reversed(file_path: str, skip: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Lazily yields the lines of a file from the last one to the first, without their "\\n".\n
+    The file is memory-mapped and scanned backwards for newlines with `rfind`, so only the pages holding
+    the yielded lines are read and only those lines become Python strings, whatever the size of the file.
+    `skip` lines are skipped from the end, `end` limits the scan to the first `end` bytes, eg the size of the file
+    when a caller started following it.
+    """
+
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if end is not None:
+            size = min(size, end)
+        if size <= 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            stop = min(size, len(mapped))
+            # A trailing "\n" ends the last line rather than starting an empty one
+            if mapped[stop - 1] == ord("\n"):
+                stop -= 1
+
+            while True:
+                start = mapped.rfind(b"\n", 0, stop) + 1
+                if skip:
+                    skip -= 1
+                else:
+                    yield mapped[start:stop].decode("utf-8", errors="replace")
+                if start == 0:
+                    return
+                stop = start - 1
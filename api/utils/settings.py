@@ -34,6 +34,52 @@ class Settings(BaseSettings):
     DB_TYPE: str = config("DB_TYPE")
     DB_URL: str = config("DB_URL")
     
+    # Query result cache used by the BaseTableModel fetch helpers
+    QUERY_CACHE_MAXSIZE: int = config("QUERY_CACHE_MAXSIZE", default=256, cast=int)
+    QUERY_CACHE_TTL_SECONDS: int = config("QUERY_CACHE_TTL_SECONDS", default=30, cast=int)
+    
+    # Alert correlation rules
+    CORRELATION_SOURCE_THRESHOLD: int = config("CORRELATION_SOURCE_THRESHOLD", default=10, cast=int)
+    CORRELATION_SOURCE_WINDOW_SECONDS: int = config("CORRELATION_SOURCE_WINDOW_SECONDS", default=60, cast=int)
+    CORRELATION_SPREAD_THRESHOLD: int = config("CORRELATION_SPREAD_THRESHOLD", default=3, cast=int)
+    CORRELATION_SPREAD_WINDOW_SECONDS: int = config("CORRELATION_SPREAD_WINDOW_SECONDS", default=300, cast=int)
+    CORRELATION_MAX_KEYS: int = config("CORRELATION_MAX_KEYS", default=50000, cast=int)
+    
+    # Live alert push
+    ALERT_BROADCAST_QUEUE_SIZE: int = config("ALERT_BROADCAST_QUEUE_SIZE", default=500, cast=int)
+    ALERT_BROADCAST_KEEPALIVE_SECONDS: int = config("ALERT_BROADCAST_KEEPALIVE_SECONDS", default=15, cast=int)
+    
+    # In-memory columnar window of recent alerts answering dashboard stats
+    HOT_WINDOW_ENABLED: bool = config("HOT_WINDOW_ENABLED", default=True, cast=bool)
+    HOT_WINDOW_HOURS: int = config("HOT_WINDOW_HOURS", default=24, cast=int)
+    HOT_WINDOW_MAX_ALERTS: int = config("HOT_WINDOW_MAX_ALERTS", default=5_000_000, cast=int)
+    
+    # Per-rule and per-host alert rate anomaly detection
+    RATE_ANOMALY_BUCKET_SECONDS: int = config("RATE_ANOMALY_BUCKET_SECONDS", default=300, cast=int)
+    RATE_ANOMALY_ALPHA: float = config("RATE_ANOMALY_ALPHA", default=0.05, cast=float)
+    RATE_ANOMALY_Z_THRESHOLD: float = config("RATE_ANOMALY_Z_THRESHOLD", default=4.0, cast=float)
+    RATE_ANOMALY_MIN_SAMPLES: int = config("RATE_ANOMALY_MIN_SAMPLES", default=12, cast=int)
+    RATE_ANOMALY_MIN_COUNT: int = config("RATE_ANOMALY_MIN_COUNT", default=10, cast=int)
+    
+    # Catalogue of the OSSEC rules enriching alerts
+    OSSEC_RULES_DIR: str = config("OSSEC_RULES_DIR", default="/var/ossec/rules")
+    OSSEC_RULES_REFRESH_SECONDS: int = config("OSSEC_RULES_REFRESH_SECONDS", default=60, cast=int)
+    
+    # Background stat of the monitored files shown on the files page
+    FILE_STAT_TTL_SECONDS: int = config("FILE_STAT_TTL_SECONDS", default=30, cast=int)
+    FILE_STAT_CACHE_SIZE: int = config("FILE_STAT_CACHE_SIZE", default=10000, cast=int)
+    FILE_STAT_WORKERS: int = config("FILE_STAT_WORKERS", default=8, cast=int)
+    FILE_STAT_WAIT_SECONDS: float = config("FILE_STAT_WAIT_SECONDS", default=0.1, cast=float)
+    
+    # Local re-hashing of the monitored files
+    FILE_VERIFY_WORKERS: int = config("FILE_VERIFY_WORKERS", default=8, cast=int)
+    
+    # Live syscheck database, read incrementally instead of copied with sudo
+    OSSEC_SYSCHECK_FILE: str = config("OSSEC_SYSCHECK_FILE", default="/var/ossec/queue/syscheck/syscheck")
+    OSSEC_SYSCHECK_POLL_SECONDS: int = config("OSSEC_SYSCHECK_POLL_SECONDS", default=60, cast=int)
+    OSSEC_SYSCHECK_FULL_SYNC_SECONDS: int = config("OSSEC_SYSCHECK_FULL_SYNC_SECONDS", default=3600, cast=int)
+    OSSEC_SYSCHECK_WORKERS: int = config("OSSEC_SYSCHECK_WORKERS", default=8, cast=int)
+    
     TEMP_DIR: str = os.path.join(Path(__file__).resolve().parent.parent.parent, 'tmp', 'media') 
 
 settings = Settings()
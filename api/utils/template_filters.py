@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional, Union
+
+
+DATETIME_FORMAT = "%m/%d/%Y, %I:%M:%S %p"
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
+def format_file_size(size: Optional[int]) -> str:
+    """1536 -> '1.5 KB'"""
+
+    if size is None:
+        return "N/A"
+    value = float(size)
+    for unit in FILE_SIZE_UNITS:
+        if value < 1024 or unit == FILE_SIZE_UNITS[-1]:
+            return f"{int(value)} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def format_permissions(mode: Optional[int]) -> str:
+    """0o644 -> '644'"""
+
+    return oct(mode)[2:] if mode is not None else "N/A"
+
+
+def format_datetime(value: Union[datetime, int, float, None], fmt: str = DATETIME_FORMAT) -> str:
+    """Formats a datetime or an epoch in local time"""
+
+    if value is None:
+        return "N/A"
+    if not isinstance(value, datetime):
+        value = datetime.fromtimestamp(value)
+    return value.strftime(fmt)
+
+
+# Registered on the Jinja environment in main.py, values are kept raw until a template renders them
+TEMPLATE_FILTERS = {
+    "filesize": format_file_size,
+    "permissions": format_permissions,
+    "datetime": format_datetime,
+}
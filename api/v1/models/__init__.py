@@ -1,3 +1,10 @@
 from api.v1.models.alert import Alert
 from api.v1.models.user import User
-from api.v1.models.token import Token, BlacklistedToken
\ No newline at end of file
+from api.v1.models.token import Token, BlacklistedToken
+from api.v1.models.incident import Incident
+from api.v1.models.rate_baseline import RateBaseline
+from api.v1.models.saved_search import SavedSearch, SavedSearchMatch
+from api.v1.models.ossec_rule import OssecRule, OssecRuleFile, OssecRuleGroup
+from api.v1.models.monitored_file import MonitoredFile
+from api.v1.models.monitored_file_change import MonitoredFileChange
+from api.v1.models.file_verification import FileVerification
\ No newline at end of file
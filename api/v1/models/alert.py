@@ -1,18 +1,50 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import Column, Index, String, Integer, DateTime, Text
 from api.core.base.base_model import BaseTableModel
 from sqlalchemy.sql import func
 
+# Number of characters of the raw log shown on alert lists
+ALERT_LOG_PREVIEW_LENGTH = 150
+
 class Alert(BaseTableModel):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Covers the time-bucketed GROUP BY of the alert stats
+        Index("ix_alerts_timestamp_level_text", "timestamp", "level_text"),
+    )
 
-    rule_id = Column(String(16), nullable=False)
+    rule_id = Column(String(16), nullable=False, index=True)
     level = Column(Integer, nullable=False)
     level_meaning = Column(String(512), nullable=True)
-    level_text = Column(String(16), nullable=True)
+    level_text = Column(String(16), nullable=True, index=True)
     description = Column(String(256), nullable=True)
     user = Column(String(64), nullable=True)
     timestamp = Column(DateTime(timezone=True), nullable=False)  # ISO format string
     hostname = Column(String(128), nullable=True)
     device_ip = Column(String(64), nullable=True)
+    src_ip = Column(String(64), nullable=True, index=True)
     log_file_path = Column(String(256), nullable=True)
     log = Column(Text, nullable=True)
+    
+    @classmethod
+    def list_columns(cls):
+        """
+        Column projection used by alert lists.\n
+        The full `log` and `level_meaning` are left out and only loaded when an alert is expanded.
+        """
+        
+        return [
+            cls.id,
+            cls.unique_id,
+            cls.rule_id,
+            cls.level,
+            cls.level_text,
+            cls.description,
+            cls.user,
+            cls.timestamp,
+            cls.hostname,
+            cls.device_ip,
+            cls.src_ip,
+            cls.log_file_path,
+            func.substr(cls.log, 1, ALERT_LOG_PREVIEW_LENGTH).label("log_preview"),
+            func.length(cls.log).label("log_length"),
+        ]
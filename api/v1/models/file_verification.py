@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, LargeBinary, String
+from api.db.database import Base
+
+
+class FileVerification(Base):
+    """
+    Result of re-hashing a monitored file locally, see `FileVerifier`.\n
+    The hashes are cached under the (dev, inode, mtime, size) the file had when it was read,
+    a file whose stat still matches is never read again.
+    """
+
+    __tablename__ = "file_verifications"
+
+    file_id = Column(Integer, primary_key=True)  # monitored_files.id
+    dev = Column(BigInteger, nullable=True)
+    inode = Column(BigInteger, nullable=True)
+    mtime_ns = Column(BigInteger, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    sha256 = Column(LargeBinary(32), nullable=True)
+    md5 = Column(LargeBinary(16), nullable=True)
+    sha1 = Column(LargeBinary(20), nullable=True)
+    # match, mismatch (the file differs from the hashes OSSEC recorded), missing or unreadable
+    result = Column(String(16), nullable=False, index=True)
+    verified_at = Column(DateTime, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import JSON, Column, Index, String, Integer, DateTime
+from api.core.base.base_model import BaseTableModel
+
+
+class Incident(BaseTableModel):
+    """Derived record emitted when correlated alerts cross a rule threshold"""
+    
+    __tablename__ = "incidents"
+    __table_args__ = (
+        Index("ix_incidents_kind_last_seen", "kind", "last_seen"),
+    )
+
+    kind = Column(String(64), nullable=False)  # Name of the correlation rule that fired
+    key = Column(String(256), nullable=False)  # Value the alerts were grouped by, eg the source IP
+    description = Column(String(512), nullable=True)
+    level = Column(Integer, nullable=False)  # Highest alert level in the window
+    level_text = Column(String(16), nullable=True)
+    alert_count = Column(Integer, nullable=False)
+    first_seen = Column(DateTime(timezone=True), nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=False, index=True)
+    alert_ids = Column(JSON, nullable=True)  # unique_ids of the alerts that triggered the incident
@@ -0,0 +1,32 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from api.db.database import Base
+
+
+class MonitoredFile(Base):
+    """
+    Latest syscheck entry of a file monitored on an agent, upserted from the syscheck databases on every sync.\n
+    A plain table with an integer primary key: its rowid is stable, which the trigram path index
+    (`monitored_files_fts`, see `MonitoredFileService`) relies on to point back to the rows.
+    """
+
+    __tablename__ = "monitored_files"
+    __table_args__ = (
+        # The same path is monitored on many agents. Also serves prefix (directory) searches within an agent
+        Index("ux_monitored_files_agent_path", "agent", "path", unique=True),
+        # AUTOINCREMENT so the id of a file that stopped being monitored is never given to another one,
+        # its change history and verification keep pointing to it
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    agent = Column(String(128), nullable=False, default="local", server_default="local")  # "local" is the manager itself
+    path = Column(String(4096), nullable=False, index=True)  # Serves prefix searches across agents
+    status = Column(String(32), nullable=False, index=True)
+    size = Column(BigInteger, nullable=True)
+    mode = Column(Integer, nullable=True)
+    uid = Column(Integer, nullable=True)
+    gid = Column(Integer, nullable=True)
+    md5 = Column(String(32), nullable=True)
+    sha1 = Column(String(40), nullable=True)
+    inode = Column(BigInteger, nullable=True)  # Only reported by agents that send extended checksums
+    last_check = Column(DateTime, nullable=True)
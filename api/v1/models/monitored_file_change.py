@@ -0,0 +1,37 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, LargeBinary
+from api.db.database import Base
+
+
+class MonitoredFileChange(Base):
+    """
+    Checksum transition of a monitored file observed while syncing the syscheck database. Append-only.\n
+    Rows point to `monitored_files` by id rather than repeating the path, and hashes are stored as raw bytes
+    (16 for md5, 20 for sha1) instead of hex, so a transition takes well under 100 bytes.
+    A file's timeline is served by the (file_id, changed_at) index.
+    """
+
+    __tablename__ = "monitored_file_changes"
+    __table_args__ = (
+        Index("ix_monitored_file_changes_file_id_changed_at", "file_id", "changed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, nullable=False)  # monitored_files.id, kept when the file stops being monitored
+    changed_at = Column(DateTime, nullable=False)  # Syscheck time of the check that saw the new checksums
+    old_md5 = Column(LargeBinary(16), nullable=True)
+    new_md5 = Column(LargeBinary(16), nullable=True)
+    old_sha1 = Column(LargeBinary(20), nullable=True)
+    new_sha1 = Column(LargeBinary(20), nullable=True)
+    old_size = Column(BigInteger, nullable=True)
+    new_size = Column(BigInteger, nullable=True)
+
+    def to_dict(self):
+        return {
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+            "old_md5": self.old_md5.hex() if self.old_md5 else None,
+            "new_md5": self.new_md5.hex() if self.new_md5 else None,
+            "old_sha1": self.old_sha1.hex() if self.old_sha1 else None,
+            "new_sha1": self.new_sha1.hex() if self.new_sha1 else None,
+            "old_size": self.old_size,
+            "new_size": self.new_size,
+        }
@@ -0,0 +1,38 @@
+from sqlalchemy import JSON, BigInteger, Column, Integer, String
+from api.db.database import Base
+
+
+class OssecRule(Base):
+    """
+    Metadata of an OSSEC rule, parsed once from the rules XML.\n
+    Plain tables rather than `BaseTableModel`s since the rows are a copy of the rule files, replaced whenever a file changes.
+    """
+
+    __tablename__ = "ossec_rules"
+
+    rule_id = Column(String(16), primary_key=True)
+    level = Column(Integer, nullable=False, default=0)
+    description = Column(String(512), nullable=True)
+    groups = Column(JSON, nullable=False)  # Groups of the rule, including the ones of its enclosing <group name="...">
+    compliance = Column(JSON, nullable=False)  # Compliance tags found in the groups, eg pci_dss_10.2.4
+    parent_ids = Column(JSON, nullable=False)  # Rules it depends on through if_sid / if_matched_sid
+    decoded_as = Column(String(64), nullable=True)  # Decoder the rule applies to
+    file_path = Column(String(512), nullable=False, index=True)  # Rule file the rule was parsed from
+
+
+class OssecRuleGroup(Base):
+    """One row per rule and group, the primary key serves "alerts of group X" as an index range scan"""
+
+    __tablename__ = "ossec_rule_groups"
+
+    group_name = Column(String(128), primary_key=True)
+    rule_id = Column(String(16), primary_key=True)
+
+
+class OssecRuleFile(Base):
+    """Rule file already parsed and its modification time, so only changed files are parsed again"""
+
+    __tablename__ = "ossec_rule_files"
+
+    path = Column(String(512), primary_key=True)
+    mtime_ns = Column(BigInteger, nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, UniqueConstraint
+from api.core.base.base_model import BaseTableModel
+
+
+class RateBaseline(BaseTableModel):
+    """Exponentially weighted baseline of the alert rate of a rule or a host"""
+    
+    __tablename__ = "rate_baselines"
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_rate_baselines_scope_key"),
+    )
+
+    scope = Column(String(16), nullable=False)  # rule or host
+    key = Column(String(256), nullable=False)
+    mean = Column(Float, nullable=False, default=0.0)  # Alerts per bucket
+    variance = Column(Float, nullable=False, default=0.0)
+    samples = Column(Integer, nullable=False, default=0)  # Closed buckets folded into the baseline
+    bucket_start = Column(DateTime, nullable=True)  # Start of the bucket still being counted
+    bucket_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,32 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String
+from api.core.base.base_model import BaseTableModel
+from api.db.database import Base
+
+
+class SavedSearch(BaseTableModel):
+    """Named alerts page filter whose results are kept up to date on ingestion"""
+    
+    __tablename__ = "saved_searches"
+
+    name = Column(String(128), nullable=False)
+    user_id = Column(String, nullable=False, index=True)  # Owner of the saved search
+    filters = Column(JSON, nullable=False)  # Alerts page filters, eg {"q": "root", "severity": "critical"}
+    match_count = Column(Integer, nullable=False, default=0)
+
+
+class SavedSearchMatch(Base):
+    """
+    Alert matching a saved search.\n
+    A plain table rather than a `BaseTableModel` since there is one row per search and alert.
+    """
+    
+    __tablename__ = "saved_search_matches"
+    __table_args__ = (
+        # Serves a saved search page, latest alerts first, without touching the alerts table until the page is known
+        Index("ix_saved_search_matches_search_timestamp", "saved_search_id", "timestamp"),
+        Index("ix_saved_search_matches_alert_id", "alert_id"),
+    )
+
+    saved_search_id = Column(String, primary_key=True)
+    alert_id = Column(String, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
@@ -1,4 +1,5 @@
 import sqlalchemy as sa, enum
+import datetime as dt
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -25,7 +26,14 @@ class Token(BaseTableModel):
     
     @hybrid_property
     def is_expired(self):
-        return self.expiry_time < sa.func.now()
+        expiry_time = self.expiry_time
+        if expiry_time.tzinfo is None:
+            expiry_time = expiry_time.replace(tzinfo=dt.timezone.utc)
+        return expiry_time < dt.datetime.now(dt.timezone.utc)
+    
+    @is_expired.expression
+    def is_expired(cls):
+        return cls.expiry_time < sa.func.now()
 
 
 class BlacklistedToken(BaseTableModel):
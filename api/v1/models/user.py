@@ -19,3 +19,18 @@ class User(BaseTableModel):
     
     def to_dict(self, excludes=[]):
         return super().to_dict(excludes=excludes+['password'])
+    
+    @classmethod
+    def list_columns(cls):
+        """Column projection used by the users list. The password hash is never loaded."""
+        
+        return [
+            cls.id,
+            cls.email,
+            cls.username,
+            cls.is_active,
+            cls.is_admin,
+            cls.is_approved,
+            cls.last_login,
+            cls.created_at,
+        ]
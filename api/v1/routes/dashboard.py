@@ -1,9 +1,12 @@
-from datetime import timedelta
-from fastapi import APIRouter, BackgroundTasks, Cookie, Depends, Form, Request
-from fastapi.responses import RedirectResponse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Cookie, Depends, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
 import psutil
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import and_
 from decouple import config
 
 from api.core.dependencies.context import add_template_context
@@ -11,12 +14,27 @@ from api.core.dependencies.flash_messages import MessageCategory, flash
 from api.core.dependencies.form_builder import build_form
 from api.db.database import get_db
 from api.utils import paginator
+from api.utils.responses import success_response
 from api.utils.settings import settings
 from api.utils.loggers import create_logger
 from api.v1.models.alert import Alert
+from api.v1.models.incident import Incident
+from api.v1.models.saved_search import SavedSearch
 from api.v1.models.user import User
+from api.v1.services.alert import AlertService
+from api.v1.services.alert_broadcaster import alert_broadcaster
+from api.v1.services.alert_export import AlertExportService
+from api.v1.services.alert_hot_window import alert_hot_window
+from api.v1.services.alert_stats import AlertStatsService, closed_bucket_cache
 from api.v1.services.auth import AuthService
+from api.v1.services.saved_search import SavedSearchService
+from api.v1.services.file_stat_cache import file_stat_cache
+from api.v1.services.file_verifier import FileVerifier
+from api.v1.services.monitored_file import MonitoredFileService
+from api.v1.services.syscheck_reader import LOCAL_AGENT, syscheck_databases
 from api.v1.services.ossec import ossec_service
+from api.v1.services.ossec_rules import rules_catalogue
+from api.v1.services.path_tree import path_tree
 from api.v1.services.system_resource import SystemResourceService
 from api.v1.services.user import UserService
 
@@ -34,6 +52,8 @@ async def dashboard(request: Request, db: Session=Depends(get_db)):
         db=db,
         per_page=4,
         sort_by='timestamp',
+        columns=Alert.list_columns(),
+        cache=True,
     )
     
     if not ossec_status:
@@ -44,7 +64,7 @@ async def dashboard(request: Request, db: Session=Depends(get_db)):
         )
         return RedirectResponse(url='/')
     
-    alerts = [alert.to_dict() for alert in recent_alerts]
+    alerts = [alert._asdict() for alert in recent_alerts]
     
     return {
         "ossec_status": ossec_status,
@@ -81,7 +101,8 @@ async def sync_alerts(request: Request, db: Session=Depends(get_db)):
     if not success:
         flash(request, "Error syncing ossec alerts", MessageCategory.ERROR)
     else:
-        flash(request, "Ossec alerts synced", MessageCategory.SUCCESS)
+        inserted = AlertService.load_synced_alerts(db)
+        flash(request, f"Ossec alerts synced. {inserted} new alerts", MessageCategory.SUCCESS)
         
     return RedirectResponse(url="/dashboard/alerts", status_code=303)
 
@@ -94,34 +115,328 @@ async def alerts(
     per_page: int = 20,
     q: str = None,
     severity: str = None,
+    start: str = None,
+    end: str = None,
+    group: str = None,
+    hostname: str = None,
+    rule_id: str = None,
+    user: str = None,
+    log_file_path: str = None,
+    facets: bool = True,
+    saved: str = None,
     db: Session=Depends(get_db),
 ):
-    search_expr = None
-    if q and q.strip():
-        term = q.strip()
-        search_expr = or_(
-            Alert.description.ilike(f"%{term}%"),
-            Alert.hostname.ilike(f"%{term}%"),
-            Alert.rule_id.ilike(f"%{term}%"),
-            Alert.user.ilike(f"%{term}%"),
+    current_user = request.state.current_user
+    saved_searches = SavedSearchService.get_user_searches(db, current_user.id)
+    
+    if saved:
+        # Saved searches are read from their result set, the filters are not run again
+        saved_search = SavedSearch.fetch_one_by_field(
+            db, 
+            id=saved, 
+            user_id=current_user.id, 
+            error_message='Saved search not found'
+        )
+        alerts = SavedSearchService.get_results(db, saved_search, page=page, per_page=per_page)
+        
+        response = paginator.build_paginated_response(
+            items=rules_catalogue.enrich(alert._asdict() for alert in alerts),
+            endpoint='/dashboard/alerts',
+            page=page,
+            size=per_page,
+            total=saved_search.match_count,
         )
+        response['saved_search'] = saved_search.to_dict()
+        response['saved_searches'] = saved_searches
+        return response
+    
+    filters = AlertService.build_alert_filters(
+        q=q,
+        severity=severity,
+        start=AlertService.parse_datetime_param(start, 'start'),
+        end=AlertService.parse_datetime_param(end, 'end'),
+        group=group,
+        hostname=hostname,
+        rule_id=rule_id,
+        user=user,
+        log_file_path=log_file_path,
+    )
 
     _, alerts, count = Alert.fetch_by_field(
         db=db, 
         page=page,
         per_page=per_page,
         sort_by='timestamp',
-        filter_expr=search_expr,
-        level_text=severity if severity != "" else None
+        filter_expr=and_(*filters) if filters else None,
+        columns=Alert.list_columns(),
+        # Free-text searches are too varied to be worth caching
+        cache=not q,
     )
     
-    return paginator.build_paginated_response(
-        items=[alert.to_dict() for alert in alerts],
+    response = paginator.build_paginated_response(
+        items=rules_catalogue.enrich(alert._asdict() for alert in alerts),
         endpoint='/dashboard/alerts',
         page=page,
         size=per_page,
         total=count,
     )
+    
+    if facets:
+        response['facets'] = AlertStatsService.get_facets(db, filters)
+    response['saved_searches'] = saved_searches
+    
+    return response
+
+
+@dashboard_router.post('/alerts/saved-searches')
+async def create_saved_search(
+    request: Request,
+    name: str = Form(...),
+    q: str = Form(None),
+    severity: str = Form(None),
+    start: str = Form(None),
+    end: str = Form(None),
+    group: str = Form(None),
+    hostname: str = Form(None),
+    rule_id: str = Form(None),
+    user: str = Form(None),
+    log_file_path: str = Form(None),
+    db: Session=Depends(get_db),
+):
+    """Saves the current alerts page filters as a named search"""
+    
+    filters = SavedSearchService.clean_filters({
+        'q': q, 'severity': severity, 'start': start, 'end': end, 'group': group,
+        'hostname': hostname, 'rule_id': rule_id, 'user': user, 'log_file_path': log_file_path,
+    })
+    filter_exprs = AlertService.build_alert_filters(
+        q=q,
+        severity=severity,
+        start=AlertService.parse_datetime_param(start, 'start'),
+        end=AlertService.parse_datetime_param(end, 'end'),
+        group=group,
+        hostname=hostname,
+        rule_id=rule_id,
+        user=user,
+        log_file_path=log_file_path,
+    )
+    
+    saved_search = SavedSearchService.create(
+        db, 
+        user_id=request.state.current_user.id, 
+        name=name, 
+        filters=filters, 
+        filter_exprs=filter_exprs
+    )
+    flash(request, f"Search '{saved_search.name}' saved with {saved_search.match_count} alerts", MessageCategory.SUCCESS)
+    
+    return RedirectResponse(url=f"/dashboard/alerts?saved={saved_search.id}", status_code=303)
+
+
+@dashboard_router.post('/alerts/saved-searches/{id}/delete')
+async def delete_saved_search(request: Request, id: str, db: Session=Depends(get_db)):
+    saved_search = SavedSearch.fetch_one_by_field(
+        db, 
+        id=id, 
+        user_id=request.state.current_user.id, 
+        error_message='Saved search not found'
+    )
+    SavedSearchService.delete(db, saved_search)
+    flash(request, f"Search '{saved_search.name}' deleted", MessageCategory.SUCCESS)
+    
+    return RedirectResponse(url="/dashboard/alerts", status_code=303)
+
+
+@dashboard_router.get('/alerts/stats')
+async def alert_stats(
+    request: Request,
+    interval: str = 'hour',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session=Depends(get_db),
+):
+    """Returns alert counts bucketed by minute, hour or day and split by severity"""
+    
+    stats = AlertStatsService.get_alert_stats(db, interval=interval, start=start, end=end)
+    
+    return success_response(
+        status_code=200,
+        message='Alert stats fetched successfully',
+        data=stats
+    )
+
+
+@dashboard_router.get('/alerts/top')
+async def alert_leaderboards(
+    request: Request,
+    fields: Optional[str] = None,
+    hours: int = 24,
+    limit: int = 10,
+    db: Session=Depends(get_db),
+):
+    """Returns the top source IPs, rule ids, hostnames and users over the last `hours` hours"""
+    
+    leaderboards = AlertStatsService.get_leaderboards(
+        db, 
+        fields=[field.strip() for field in fields.split(',') if field.strip()] if fields else None,
+        hours=hours, 
+        limit=limit
+    )
+    
+    return success_response(
+        status_code=200,
+        message='Alert leaderboards fetched successfully',
+        data=leaderboards
+    )
+
+
+@dashboard_router.get('/alerts/incidents')
+async def alert_incidents(
+    request: Request,
+    page: int = 1,
+    per_page: int = 20,
+    kind: str = None,
+    db: Session=Depends(get_db),
+):
+    """Returns the incidents raised by the alert correlation rules, latest first"""
+    
+    _, incidents, count = Incident.fetch_by_field(
+        db=db,
+        page=page,
+        per_page=per_page,
+        sort_by='last_seen',
+        kind=kind,
+    )
+    
+    return paginator.build_paginated_response(
+        items=[incident.to_dict() for incident in incidents],
+        endpoint='/dashboard/alerts/incidents',
+        page=page,
+        size=per_page,
+        total=count,
+    )
+
+
+@dashboard_router.get('/alerts/export')
+async def export_alerts(
+    request: Request,
+    format: str = 'csv',
+    q: str = None,
+    severity: str = None,
+    start: str = None,
+    end: str = None,
+    group: str = None,
+    hostname: str = None,
+    rule_id: str = None,
+    user: str = None,
+    log_file_path: str = None,
+    gzip: bool = False,
+):
+    """Streams every alert matching the alerts page filters as CSV or NDJSON"""
+    
+    media_type = AlertExportService.get_media_type(format, gzip)
+    filters = AlertService.build_alert_filters(
+        q=q,
+        severity=severity,
+        start=AlertService.parse_datetime_param(start, 'start'),
+        end=AlertService.parse_datetime_param(end, 'end'),
+        group=group,
+        hostname=hostname,
+        rule_id=rule_id,
+        user=user,
+        log_file_path=log_file_path,
+    )
+    
+    return StreamingResponse(
+        AlertExportService.stream_export(filters, format=format, compress=gzip),
+        media_type=media_type,
+        headers={
+            'Content-Disposition': f'attachment; filename="{AlertExportService.get_filename(format, gzip)}"'
+        }
+    )
+
+
+@dashboard_router.get('/alerts/live')
+async def live_alerts(request: Request, severity: str = None):
+    """
+    Server-sent event stream of newly ingested alerts.\n
+    `severity` is a comma separated list of severities to receive, all severities are sent when it is not set.
+    """
+    
+    severities = [level.strip() for level in severity.split(',') if level.strip()] if severity else None
+    
+    async def event_stream():
+        async with alert_broadcaster.subscribe(severities) as subscriber:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), 
+                        timeout=settings.ALERT_BROADCAST_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeping proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                
+                yield f"event: alert\ndata: {message}\n\n"
+    
+    return StreamingResponse(
+        event_stream(), 
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@dashboard_router.post("/alerts/dismiss")
+async def dismiss_alerts(
+    request: Request,
+    q: str = Form(None),
+    severity: str = Form(None),
+    start: str = Form(None),
+    end: str = Form(None),
+    group: str = Form(None),
+    hostname: str = Form(None),
+    rule_id: str = Form(None),
+    user: str = Form(None),
+    log_file_path: str = Form(None),
+    db: Session=Depends(get_db),
+):
+    """Dismisses (soft deletes) every alert matching the current alerts page filters in one statement"""
+    
+    AuthService.ensure_admin(request.state.current_user)
+    
+    filters = [Alert.is_deleted == False] + AlertService.build_alert_filters(
+        q=q,
+        severity=severity,
+        start=AlertService.parse_datetime_param(start, 'start'),
+        end=AlertService.parse_datetime_param(end, 'end'),
+        group=group,
+        hostname=hostname,
+        rule_id=rule_id,
+        user=user,
+        log_file_path=log_file_path,
+    )
+    
+    dismissed = Alert.bulk_delete(db, and_(*filters))
+    closed_bucket_cache.clear()
+    alert_hot_window.invalidate()
+    SavedSearchService.prune_deleted_alerts(db)
+    flash(request, f"{dismissed} alerts dismissed", MessageCategory.SUCCESS)
+    
+    return RedirectResponse(url="/dashboard/alerts", status_code=303)
+
+
+@dashboard_router.get('/alerts/{id}')
+async def alert_detail(request: Request, id: str, db: Session=Depends(get_db)):
+    """Returns the full alert, including the raw log, when an alert is expanded"""
+    
+    alert = Alert.fetch_by_id(db, id, 'Alert not found')
+    
+    return success_response(
+        status_code=200,
+        message='Alert fetched successfully',
+        data={**alert.to_dict(), 'rule': rules_catalogue.get(alert.rule_id)}
+    )
 
 
 @dashboard_router.get('/processes')
@@ -167,32 +482,90 @@ async def files(
     page: int = 1,
     per_page: int = 20,
     path: str = None,
+    prefix: str = None,
     status: str = None,
+    verification: str = None,
+    agent: str = None,
+    db: Session=Depends(get_db),
 ):
-    offset = (page - 1) * per_page
-        
-    all_files, total = ossec_service.get_all_monitored_files(limit=per_page, offset=offset)
-    
-    if path:
-        all_files = [file for file in all_files if path.lower() in file.get("path", "").lower()]
-    if status:
-        all_files = [file for file in all_files if file.get("status", "").lower() == status.lower()]
+    # The table is kept current by the MonitoredFileService.watch thread, requests only read it
+    filters = MonitoredFileService.build_filters(
+        db, path=path, prefix=prefix, status=status, verification=verification, agent=agent
+    )
+    files, total = MonitoredFileService.get_files(db, filters, page=page, per_page=per_page)
+    # Stats come from the background cache, files on a slow mount are shown as pending.
+    # The short wait for the missing ones happens on a worker thread, not on the event loop
+    file_stats = await run_in_threadpool(file_stat_cache.get_many, [file.path for file in files])
             
-    return paginator.build_paginated_response(
-        items=all_files,
+    response = paginator.build_paginated_response(
+        items=[ossec_service.format_monitored_file(file, file_stats[file.path]) for file in files],
         endpoint='/dashboard/files',
         page=page,
         size=per_page,
         total=total,
     )
+    # Directories under the current prefix, to drill down with their file counts
+    response['directory'] = path_tree.browse(db, prefix or '/', agent=agent)
+    response['agents'] = path_tree.agents(db)
+    return response
+    
+
+@dashboard_router.get('/files/tree')
+async def file_tree(request: Request, path: str = '/', agent: str = None, db: Session=Depends(get_db)):
+    """Returns a directory of the monitored paths with its file counts by status, and the same for its children"""
+    
+    directory = path_tree.browse(db, path, agent=agent)
+    if directory is None:
+        raise HTTPException(status_code=404, detail='No monitored files under this path')
+    
+    return success_response(
+        status_code=200,
+        message='Directory fetched successfully',
+        data=directory
+    )
+    
+
+@dashboard_router.get('/files/history')
+async def file_history(
+    request: Request,
+    path: str,
+    agent: str = LOCAL_AGENT,
+    page: int = 1,
+    per_page: int = 20,
+    db: Session=Depends(get_db),
+):
+    """Returns the checksum changes of a monitored file, latest first"""
+    
+    changes, count = MonitoredFileService.get_history(db, path, agent=agent, page=page, per_page=per_page)
+    
+    return paginator.build_paginated_response(
+        items=changes,
+        endpoint='/dashboard/files/history',
+        page=page,
+        size=per_page,
+        total=count,
+    )
+    
+
+@dashboard_router.post("/files/verify")
+async def verify_files(request: Request):
+    if FileVerifier.start():
+        flash(request, "Verification of the monitored files started", MessageCategory.SUCCESS)
+    else:
+        flash(request, "A verification of the monitored files is already running", MessageCategory.INFO)
+        
+    return RedirectResponse(url="/dashboard/files", status_code=303)
     
 
 @dashboard_router.post("/sync-files")
 async def sync_files(request: Request, db: Session=Depends(get_db)):
-    success = ossec_service.sync_monitored_files()
+    # The live database is read directly, the sudo snapshot is only taken when it is not readable
+    # Off the event loop, a full read of every agent database takes seconds
+    success = syscheck_databases.live_readable() or await run_in_threadpool(ossec_service.sync_monitored_files)
     if not success:
         flash(request, "Error syncing monitored files", MessageCategory.ERROR)
     else:
+        await run_in_threadpool(MonitoredFileService.refresh, db, full=True)
         flash(request, "Monitored files synced", MessageCategory.SUCCESS)
         
     return RedirectResponse(url="/dashboard/files", status_code=303)
@@ -222,7 +595,7 @@ async def users(
     else:
         is_approved = None
         
-    query, users, count = User.fetch_by_field(
+    _, users, count = User.fetch_by_field(
         db=db, 
         page=page,
         per_page=per_page,
@@ -230,19 +603,18 @@ async def users(
         search_fields={
             'username': username if username != "" else None,
         },
+        filter_expr=and_(
+            User.id != request.state.current_user.id,
+            User.is_admin == False
+        ),
+        columns=User.list_columns(),
+        cache=True,
         is_active=is_active,
         is_approved=is_approved
     )
     
-    query = query.filter(
-        User.id != request.state.current_user.id,
-        User.is_admin == False
-    )
-    count = query.count()
-    users = query.all()
-    
     return paginator.build_paginated_response(
-        items=[user.to_dict() for user in users],
+        items=[user._asdict() for user in users],
         endpoint='/dashboard/users',
         page=page,
         size=per_page,
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from decouple import config
 
@@ -22,6 +23,13 @@ from api.utils.telex_notification import TelexNotification
 user_router = APIRouter(prefix='/users', tags=['User'])
 logger = create_logger(__name__)
 
+# Column values set by each bulk user action
+BULK_USER_ACTIONS = {
+    'approve': {'is_approved': True, 'is_active': True},
+    'activate': {'is_active': True},
+    'deactivate': {'is_active': False},
+}
+
 @user_router.get('/me', status_code=200, response_model=success_response)
 async def get_current_user(db: Session=Depends(get_db), user: User=Depends(AuthService.get_current_user)):
     """Endpoint to get the current user
@@ -71,6 +79,41 @@ async def update_user_details(
     )
     
 
+@user_router.post('/bulk-action')
+async def bulk_user_action(
+    request: Request,
+    db: Session=Depends(get_db), 
+):
+    """Endpoint for an admin to approve, activate, deactivate or delete many users at once"""
+    
+    try:
+        current_user = getattr(request.state, 'current_user', None)
+        AuthService.ensure_admin(current_user)
+        
+        form = await request.form()
+        ids = form.getlist('ids')
+        action = form.get('action')
+        if not ids:
+            raise HTTPException(400, 'No users selected')
+        
+        # Admin accounts are never changed by bulk actions
+        filter_expr = and_(User.id.in_(ids), User.is_admin == False)
+        
+        if action == 'delete':
+            count = User.bulk_delete(db, filter_expr)
+        elif action in BULK_USER_ACTIONS:
+            count = User.bulk_update(db, filter_expr, BULK_USER_ACTIONS[action])
+        else:
+            raise HTTPException(400, 'Invalid action')
+        
+        flash(request, f'{count} users updated', MessageCategory.SUCCESS)
+                
+    except HTTPException as e:
+        flash(request, e.detail, MessageCategory.ERROR)
+
+    return RedirectResponse(url='/dashboard/users', status_code=303)
+
+
 @user_router.post('/{id}/edit')
 async def edit_user(
     id: str,
@@ -80,8 +123,8 @@ async def edit_user(
     """Endpoint to a user to update their details"""
     
     try:
-        current_user = request.state.current_user
-        AuthService.is_user_admin(db, current_user.id)
+        current_user = getattr(request.state, 'current_user', None)
+        AuthService.ensure_admin(current_user)
         user = User.fetch_by_id(db, id, 'User does not exist')
         
         payload = await build_payload(request, boolean_fields=['is_active', 'is_approved', 'is_admin'])
@@ -112,8 +155,8 @@ async def delete_user(
 ):
     """Endpoint to a user to update their details"""
     
-    current_user = request.state.current_user
-    AuthService.is_user_admin(db, current_user.id)
+    current_user = getattr(request.state, 'current_user', None)
+    AuthService.ensure_admin(current_user)
     user = User.fetch_by_id(db, id, 'User does not exist')
     
     user = User.delete(
@@ -0,0 +1,182 @@
+from datetime import datetime
+import json
+import os
+from uuid import uuid4
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from api.utils.loggers import create_logger
+from api.utils.settings import BASE_DIR
+from api.v1.models.alert import Alert
+from api.v1.models.incident import Incident
+from api.v1.services.alert_broadcaster import alert_broadcaster
+from api.v1.services.alert_hot_window import alert_hot_window
+from api.v1.services.alert_stats import FACET_FIELDS, closed_bucket_cache
+from api.v1.services.correlation import correlation_engine
+from api.v1.services.ossec import ossec_service
+from api.v1.services.ossec_rules import rules_catalogue
+from api.v1.services.rate_anomaly import rate_anomaly_detector
+from api.v1.services.saved_search import SavedSearchService
+
+
+logger = create_logger(__name__)
+
+ALERTS_DIR = os.path.join(BASE_DIR, "logs", "ossec-alerts")
+
+# Number of ids checked per `IN (...)` query when looking for already loaded alerts
+EXISTING_IDS_CHUNK_SIZE = 500
+
+
+class AlertService:
+    
+    @classmethod
+    def build_search_filter(cls, q: Optional[str] = None):
+        """Builds the free-text filter of the alerts page"""
+        
+        if not q or not q.strip():
+            return None
+        
+        term = q.strip()
+        return or_(
+            Alert.description.ilike(f"%{term}%"),
+            Alert.hostname.ilike(f"%{term}%"),
+            Alert.rule_id.ilike(f"%{term}%"),
+            Alert.user.ilike(f"%{term}%"),
+            Alert.src_ip.ilike(f"%{term}%"),
+        )
+    
+    @classmethod
+    def parse_datetime_param(cls, value: Optional[str], name: str) -> Optional[datetime]:
+        """Parses an optional ISO datetime query/form value, treating an empty value as not set"""
+        
+        if not value or not value.strip():
+            return None
+        
+        try:
+            return datetime.fromisoformat(value.strip())
+        except ValueError:
+            raise HTTPException(400, f"Invalid {name} date")
+    
+    @classmethod
+    def build_alert_filters(
+        cls,
+        q: Optional[str] = None,
+        severity: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        group: Optional[str] = None,
+        **fields: Optional[str],
+    ) -> list:
+        """
+        Builds the filter expressions of the alerts page filters, shared by the list, dismiss and export.\n
+        `group` matches the alerts of the rules in an OSSEC rule group, eg `group="authentication_failed"`.
+        `fields` are exact matches on the facet fields, eg `hostname="server-01"`.
+        """
+        
+        filters = []
+        search_expr = cls.build_search_filter(q)
+        if search_expr is not None:
+            filters.append(search_expr)
+        if severity:
+            filters.append(Alert.level_text == severity)
+        if start:
+            filters.append(Alert.timestamp >= start)
+        if end:
+            filters.append(Alert.timestamp < end)
+        if group:
+            filters.append(rules_catalogue.build_group_filter(group))
+        for name, value in fields.items():
+            if value:
+                filters.append(FACET_FIELDS[name] == value)
+        return filters
+    
+    @classmethod
+    def get_existing_unique_ids(cls, db: Session, unique_ids: List[str]) -> set:
+        """Returns the ids in `unique_ids` that are already stored"""
+        
+        existing_ids = set()
+        for start in range(0, len(unique_ids), EXISTING_IDS_CHUNK_SIZE):
+            chunk = unique_ids[start:start + EXISTING_IDS_CHUNK_SIZE]
+            existing_ids.update(
+                row[0] for row in db.query(Alert.unique_id).filter(Alert.unique_id.in_(chunk)).all()
+            )
+        return existing_ids
+    
+    @classmethod
+    def build_alert_row(cls, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """Maps an alert produced by `sync_ossec_alerts_to_json.py` to the columns of the alerts table"""
+        
+        return {
+            # Generated here rather than by the column default so the id can be pushed to live clients
+            "id": uuid4().hex,
+            "unique_id": alert.get("alert_id"),
+            "rule_id": alert.get("rule_id"),
+            "level": alert.get("level"),
+            "level_meaning": alert.get("level_meaning"),
+            "level_text": ossec_service.get_ossec_level_text(alert.get("level")),
+            "description": alert.get("description"),
+            "user": alert.get("user"),
+            "timestamp": datetime.fromisoformat(alert.get("timestamp")) if alert.get("timestamp") else None,
+            "hostname": alert.get("hostname"),
+            "device_ip": alert.get("device_ip"),
+            "src_ip": alert.get("src_ip"),
+            "log_file_path": alert.get("log_file_path"),
+            "log": alert.get("log"),
+        }
+    
+    @classmethod
+    def ingest_alerts(cls, db: Session, alerts_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stores alerts that are not in the database yet with a single bulk insert and returns the inserted rows"""
+        
+        unique_ids = [a.get("alert_id") for a in alerts_data if a.get("alert_id")]
+        seen_ids = cls.get_existing_unique_ids(db, unique_ids)
+        
+        rows = []
+        for alert in alerts_data:
+            alert_id = alert.get("alert_id")
+            if alert_id in seen_ids:
+                continue
+            if alert_id:
+                seen_ids.add(alert_id)
+            rows.append(cls.build_alert_row(alert))
+        
+        Alert.bulk_create(db, rows)
+        
+        # Alerts can be ingested with timestamps that fall into already closed stats buckets
+        closed_bucket_cache.evict(row["timestamp"] for row in rows)
+        alert_hot_window.append(rows)
+        
+        incidents = correlation_engine.process(rows) + rate_anomaly_detector.process(db, rows)
+        if incidents:
+            Incident.bulk_create(db, incidents)
+        
+        SavedSearchService.match_alerts(db, rows)
+        alert_broadcaster.publish(rows)
+        return rows
+    
+    @classmethod
+    def load_alerts_from_file(cls, db: Session, file_path: str) -> int:
+        """Loads the alerts of an `alerts.json` file into the database"""
+        
+        with open(file_path, "r") as f:
+            alerts_data = json.load(f)
+        
+        rows = cls.ingest_alerts(db, alerts_data)
+        logger.info(f"Inserted {len(rows)} alerts from {file_path}")
+        return len(rows)
+    
+    @classmethod
+    def load_synced_alerts(cls, db: Session, alerts_dir: str = ALERTS_DIR) -> int:
+        """Loads every `alerts.json` produced by the alerts sync into the database"""
+        
+        if not os.path.isdir(alerts_dir):
+            return 0
+        
+        inserted = 0
+        for directory in sorted(os.listdir(alerts_dir)):
+            alerts_file = os.path.join(alerts_dir, directory, "alerts.json")
+            if os.path.isfile(alerts_file):
+                inserted += cls.load_alerts_from_file(db, alerts_file)
+        return inserted
@@ -0,0 +1,109 @@
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.alert import ALERT_LOG_PREVIEW_LENGTH
+
+
+logger = create_logger(__name__)
+
+# Alert fields pushed to live clients, the full log is fetched on demand like on the alerts page
+BROADCAST_FIELDS = (
+    "id", "unique_id", "rule_id", "level", "level_text", "description", "user",
+    "hostname", "device_ip", "src_ip", "log_file_path",
+)
+
+
+class AlertSubscriber:
+    """A connected client with its own bounded queue of pending messages"""
+
+    __slots__ = ("loop", "queue", "severities", "dropped")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int, severities: Optional[Set[str]] = None):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.severities = severities
+        self.dropped = 0
+
+    def wants(self, level_text: Optional[str]) -> bool:
+        return not self.severities or level_text in self.severities
+
+    def put(self, message: str):
+        """Queues a message, dropping the oldest one when a slow client's queue is full. Runs on the subscriber's loop"""
+
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class AlertBroadcaster:
+    """
+    In-process fan-out of newly ingested alerts to connected dashboards.\n
+    Each alert is serialized once per publish and shared by every subscriber, filtering by severity happens here,
+    so connected clients cost no database queries.
+    """
+
+    def __init__(self, queue_size: int = settings.ALERT_BROADCAST_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[AlertSubscriber] = set()
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, severities: Optional[Iterable[str]] = None):
+        subscriber = AlertSubscriber(
+            asyncio.get_running_loop(),
+            self.queue_size,
+            set(severities) if severities else None
+        )
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+            if subscriber.dropped:
+                logger.info(f"Live alert subscriber dropped {subscriber.dropped} messages")
+
+    def publish(self, alerts: Iterable[Dict[str, Any]]):
+        """Pushes alert rows to every subscriber. Safe to call from any thread"""
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        for alert in alerts:
+            level_text = alert.get("level_text")
+            targets = [subscriber for subscriber in subscribers if subscriber.wants(level_text)]
+            if not targets:
+                continue
+
+            message = self.serialize(alert)
+            for subscriber in targets:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.put, message)
+                except RuntimeError:
+                    # The subscriber's loop has been closed
+                    with self._lock:
+                        self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def serialize(alert: Dict[str, Any]) -> str:
+        data = {field: alert.get(field) for field in BROADCAST_FIELDS}
+        timestamp = alert.get("timestamp")
+        data["timestamp"] = timestamp.isoformat() if timestamp else None
+        data["log_preview"] = (alert.get("log") or "")[:ALERT_LOG_PREVIEW_LENGTH]
+        return json.dumps(data)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+alert_broadcaster = AlertBroadcaster()
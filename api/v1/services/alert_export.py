@@ -0,0 +1,116 @@
+import csv
+from datetime import datetime
+import io
+import json
+from typing import Iterator, List
+import zlib
+
+from fastapi import HTTPException
+from sqlalchemy import and_
+
+from api.db.database import SessionLocal
+from api.utils.loggers import create_logger
+from api.v1.models.alert import Alert
+
+
+logger = create_logger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Columns written to exports, in order
+EXPORT_COLUMNS = (
+    "unique_id", "timestamp", "rule_id", "level", "level_text", "description",
+    "user", "hostname", "device_ip", "src_ip", "log_file_path", "log",
+)
+
+# Rows fetched from the database cursor per round trip
+EXPORT_FETCH_SIZE = 1000
+
+# Bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class AlertExportService:
+
+    @classmethod
+    def get_media_type(cls, format: str, compress: bool = False) -> str:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(400, f"Format must be one of {', '.join(EXPORT_FORMATS)}")
+        return "application/gzip" if compress else EXPORT_FORMATS[format]
+
+    @classmethod
+    def get_filename(cls, format: str, compress: bool = False) -> str:
+        filename = f"alerts-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+        return f"{filename}.gz" if compress else filename
+
+    @classmethod
+    def iter_rows(cls, filters: List) -> Iterator[tuple]:
+        """
+        Yields the matching alerts as plain row tuples.\n
+        Rows are streamed from the cursor `EXPORT_FETCH_SIZE` at a time, so memory use does not grow with the export size.
+        The generator owns a dedicated session, not the thread-local one of `get_db_with_ctx_manager`: it keeps running
+        after the request session has been closed, on threadpool threads that other requests and exports also use.
+        """
+
+        db = SessionLocal()
+        try:
+            query = (
+                db.query(*[getattr(Alert, column) for column in EXPORT_COLUMNS])
+                .filter(and_(Alert.is_deleted == False, *filters))
+                .order_by(Alert.timestamp.desc())
+                .execution_options(yield_per=EXPORT_FETCH_SIZE)
+            )
+            for row in query:
+                yield row
+        finally:
+            db.close()
+
+    @classmethod
+    def _encode_csv(cls, rows: Iterator[tuple]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @classmethod
+    def _encode_ndjson(cls, rows: Iterator[tuple]) -> Iterator[str]:
+        chunk = []
+        size = 0
+
+        for row in rows:
+            line = json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n"
+            chunk.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+        yield "".join(chunk)
+
+    @classmethod
+    def stream_export(cls, filters: List, format: str = "csv", compress: bool = False) -> Iterator[bytes]:
+        """Streams the matching alerts as CSV or NDJSON, gzip compressed on the fly when `compress` is set"""
+
+        encode = cls._encode_csv if format == "csv" else cls._encode_ndjson
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        for chunk in encode(cls.iter_rows(filters)):
+            data = chunk.encode("utf-8")
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+
+        if compressor:
+            yield compressor.flush()
@@ -0,0 +1,314 @@
+from array import array
+from datetime import datetime, timedelta
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sqlalchemy.orm import Session
+
+from api.db.database import get_db_with_ctx_manager
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.alert import Alert
+
+
+logger = create_logger(__name__)
+
+# Severity codes stored in the `severity` column, anything else is stored as "unknown"
+HOT_WINDOW_SEVERITIES = ("info", "moderate", "high", "critical", "unknown")
+_SEVERITY_CODES = {level: code for code, level in enumerate(HOT_WINDOW_SEVERITIES)}
+
+# String columns stored as interned ids, keyed by the Alert attribute they come from
+INTERNED_FIELDS = ("rule_id", "hostname", "user", "src_ip")
+
+# array typecode of every column
+COLUMN_TYPECODES = {
+    "timestamp": "d",
+    "level": "h",
+    "severity": "b",
+    **{field: "i" for field in INTERNED_FIELDS},
+}
+
+# Seconds between two passes dropping alerts that left the window
+PRUNE_INTERVAL_SECONDS = 60
+
+# Rows read per round trip when warming the window from the database
+WARM_FETCH_SIZE = 5000
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Converts a timestamp to seconds the same way alerts are compared in the database, as naive wall-clock time"""
+
+    return timestamp.replace(tzinfo=None).timestamp()
+
+
+class _Interner:
+    """Maps strings to small integer ids, id 0 is reserved for missing values"""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[Optional[str]] = [None]
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+class AlertHotWindow:
+    """
+    Columnar in-memory copy of the alerts of the last `hours` hours.\n
+    Every column is a typed `array`, strings are interned to integer ids, so a million alerts take about 25MB.
+    Counts, histograms and top-N queries are vectorized scans over zero-copy numpy views of the arrays.
+    The window is loaded from the database in the background and kept current by ingestion,
+    callers must check `covers()` and fall back to SQL until it is ready or when numpy is not installed.
+    """
+
+    def __init__(self, hours: int = settings.HOT_WINDOW_HOURS, max_alerts: int = settings.HOT_WINDOW_MAX_ALERTS):
+        self.hours = hours
+        self.max_alerts = max_alerts
+        self._lock = threading.RLock()
+        self._reset()
+        self._ready = False
+        self._warming = False
+        self._rewarm = False
+        self._pending: List[Dict[str, Any]] = []
+
+    def _reset(self):
+        self._columns = {name: array(typecode) for name, typecode in COLUMN_TYPECODES.items()}
+        self._interners = {field: _Interner() for field in INTERNED_FIELDS}
+        self._since = 0.0
+        self._last_prune = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._columns["timestamp"])
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def covers(self, start: datetime) -> bool:
+        """Returns True if every alert since `start` is held by the window"""
+
+        return self._ready and to_epoch(start) >= self._since
+
+    def _append_row(self, timestamp: datetime, level: Optional[int], level_text: Optional[str], values: Iterable[Optional[str]]):
+        columns = self._columns
+        columns["timestamp"].append(to_epoch(timestamp))
+        columns["level"].append(level or 0)
+        columns["severity"].append(_SEVERITY_CODES.get(level_text, _SEVERITY_CODES["unknown"]))
+        for field, value in zip(INTERNED_FIELDS, values):
+            columns[field].append(self._interners[field].intern(value))
+
+    def append(self, rows: Iterable[Dict[str, Any]]):
+        """Adds newly ingested alert rows (as built by `AlertService.build_alert_row`)"""
+
+        with self._lock:
+            if self._warming:
+                # Applied once the window is loaded, the warm query does not see alerts committed after it started
+                self._pending.extend(rows)
+                return
+            if not self._ready:
+                return
+
+            for row in rows:
+                if row.get("timestamp") is None:
+                    continue
+                self._append_row(
+                    row["timestamp"],
+                    row.get("level"),
+                    row.get("level_text"),
+                    (row.get(field) for field in INTERNED_FIELDS)
+                )
+            self._check_size()
+
+    def _check_size(self):
+        if len(self) > self.max_alerts:
+            logger.warning(f"Alert hot window exceeded {self.max_alerts} alerts and was disabled")
+            self._ready = False
+            self._reset()
+
+    def warm(self, db: Optional[Session] = None):
+        """Loads the alerts of the window from the database. Runs in a background thread with its own session unless `db` is given"""
+
+        if np is None:
+            logger.info("numpy is not installed, alert stats are served from the database")
+            return
+
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+            self._ready = False
+            self._pending = []
+            self._reset()
+
+        started = time.perf_counter()
+        since = datetime.now() - timedelta(hours=self.hours)
+        try:
+            if db is None:
+                with get_db_with_ctx_manager() as db:
+                    self._load(db, since)
+            else:
+                self._load(db, since)
+        except Exception as e:
+            logger.error(f"Failed to load the alert hot window: {e}")
+            with self._lock:
+                self._warming = False
+                self._pending = []
+                self._reset()
+            return
+
+        with self._lock:
+            self._since = to_epoch(since)
+            self._warming = False
+            if self._rewarm:
+                # Invalidated while loading, the loaded alerts may already be stale
+                self._rewarm = False
+                threading.Thread(target=self.warm, daemon=True).start()
+                return
+            self._ready = True
+            pending, self._pending = self._pending, []
+            self.append(pending)
+
+        logger.info(f"Alert hot window loaded {len(self)} alerts in {time.perf_counter() - started:.2f}s")
+
+    def _load(self, db: Session, since: datetime):
+        query = (
+            db.query(
+                Alert.timestamp, Alert.level, Alert.level_text,
+                *[getattr(Alert, field) for field in INTERNED_FIELDS],
+            )
+            .filter(Alert.is_deleted == False, Alert.timestamp >= since)
+            .execution_options(yield_per=WARM_FETCH_SIZE)
+        )
+        for timestamp, level, level_text, *values in query:
+            self._append_row(timestamp, level, level_text, values)
+
+    def invalidate(self):
+        """Reloads the window in the background, used after alerts are dismissed"""
+
+        with self._lock:
+            self._ready = False
+            if self._warming:
+                self._rewarm = True
+                return
+        threading.Thread(target=self.warm, daemon=True).start()
+
+    def _prune(self):
+        """Drops alerts that are older than the window, at most once every `PRUNE_INTERVAL_SECONDS`"""
+
+        if time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = time.monotonic()
+
+        cutoff = time.time() - self.hours * 3600
+        keep = self._view("timestamp") >= cutoff
+        if not keep.all():
+            # numpy views are built and dropped in one expression so the arrays can be replaced
+            self._columns = {
+                name: array(column.typecode, self._view(name)[keep].tobytes())
+                for name, column in self._columns.items()
+            }
+        self._since = max(self._since, cutoff)
+
+    def _view(self, name: str):
+        """Zero-copy numpy view of a column, must not outlive the current locked section"""
+
+        column = self._columns[name]
+        if not len(column):
+            return np.zeros(0, dtype=column.typecode)
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def _resolve_filters(self, filters: Dict[str, Optional[str]]) -> Optional[Dict[str, int]]:
+        """Maps exact-match filters to column codes, returns None when a value cannot match any alert"""
+
+        resolved = {}
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field == "severity":
+                code = _SEVERITY_CODES.get(value)
+            else:
+                code = self._interners[field].ids.get(value)
+            if code is None:
+                return None
+            resolved[field] = code
+        return resolved
+
+    def _mask(self, start: float, end: Optional[float], resolved: Dict[str, int]):
+        mask = self._view("timestamp") >= start
+        if end is not None:
+            mask &= self._view("timestamp") < end
+        for field, code in resolved.items():
+            mask &= self._view(field) == code
+        return mask
+
+    def count(self, start: datetime, end: Optional[datetime] = None, **filters: Optional[str]) -> int:
+        """Counts the alerts between start and end matching exact `filters` on severity, rule_id, hostname, user or src_ip"""
+
+        with self._lock:
+            self._prune()
+            resolved = self._resolve_filters(filters)
+            if resolved is None:
+                return 0
+
+            start, end = to_epoch(start), to_epoch(end) if end else None
+            return int(np.count_nonzero(self._mask(start, end, resolved)))
+
+    def count_buckets(self, start: datetime, end: datetime, step: timedelta) -> Dict[datetime, Dict[str, int]]:
+        """Counts alerts per `step` wide bucket starting at `start` and per severity, in the shape of `AlertStatsService._count_buckets`"""
+
+        step_seconds = step.total_seconds()
+        bucket_count = int(-(-(end - start).total_seconds() // step_seconds))
+        levels = len(HOT_WINDOW_SEVERITIES)
+
+        with self._lock:
+            self._prune()
+            start_epoch, end_epoch = to_epoch(start), to_epoch(end)
+
+            mask = self._mask(start_epoch, end_epoch, {})
+            buckets = ((self._view("timestamp")[mask] - start_epoch) // step_seconds).astype(np.int64)
+            cells = buckets * levels + self._view("severity")[mask]
+            grid = np.bincount(cells, minlength=bucket_count * levels).reshape(bucket_count, levels)
+            nonzero = [(int(b), int(s), int(grid[b, s])) for b, s in zip(*np.nonzero(grid))]
+
+        counts: Dict[datetime, Dict[str, int]] = {}
+        for bucket, severity, count in nonzero:
+            counts.setdefault(start + bucket * step, {})[HOT_WINDOW_SEVERITIES[severity]] = count
+        return counts
+
+    def top(self, field: str, start: datetime, end: Optional[datetime] = None, limit: int = 10, **filters: Optional[str]) -> List[Dict]:
+        """Returns the `limit` most frequent values of an interned field, in the shape of `AlertStatsService.get_top_values`"""
+
+        with self._lock:
+            self._prune()
+            resolved = self._resolve_filters(filters)
+            if resolved is None:
+                return []
+
+            start, end = to_epoch(start), to_epoch(end) if end else None
+            values = self._interners[field].values
+
+            ids = self._view(field)[self._mask(start, end, resolved)]
+            counts = np.bincount(ids, minlength=len(values))
+            counts[0] = 0  # missing values are not ranked
+            top_ids = np.argpartition(counts, -limit)[-limit:] if len(counts) > limit else np.arange(len(counts))
+            ranked = sorted(((int(counts[i]), int(i)) for i in top_ids if counts[i]), reverse=True)
+
+        return [{"value": values[value_id], "count": count} for count, value_id in ranked]
+
+
+alert_hot_window = AlertHotWindow()
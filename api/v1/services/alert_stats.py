@@ -0,0 +1,330 @@
+from datetime import datetime, timedelta
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional
+from cachetools import LRUCache
+from fastapi import HTTPException
+from sqlalchemy import String, and_, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from api.utils.loggers import create_logger
+from api.utils.query_cache import query_cache
+from api.v1.models.alert import Alert
+from api.v1.services.alert_hot_window import INTERNED_FIELDS, alert_hot_window
+
+
+logger = create_logger(__name__)
+
+# Bucket size and default chart span of each supported interval
+STATS_INTERVALS = {
+    "minute": (timedelta(minutes=1), timedelta(hours=1)),
+    "hour": (timedelta(hours=1), timedelta(days=1)),
+    "day": (timedelta(days=1), timedelta(days=30)),
+}
+
+# strftime formats truncating a timestamp to the start of its bucket (SQLite)
+SQLITE_BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+SEVERITY_LEVELS = ["info", "moderate", "high", "critical"]
+
+MAX_STATS_BUCKETS = 2000
+
+# Alert columns that can be ranked by the top-N leaderboards
+TOP_FIELDS = {
+    "src_ip": Alert.src_ip,
+    "rule_id": Alert.rule_id,
+    "hostname": Alert.hostname,
+    "user": Alert.user,
+}
+
+MAX_TOP_LIMIT = 100
+
+# Alert columns with facet counts on the alerts page, they can also be filtered on by exact value
+FACET_FIELDS = {
+    "level_text": Alert.level_text,
+    "hostname": Alert.hostname,
+    "rule_id": Alert.rule_id,
+    "user": Alert.user,
+    "log_file_path": Alert.log_file_path,
+}
+
+# Values returned per facet
+FACET_LIMIT = 10
+
+
+def to_local_naive(timestamp: datetime) -> datetime:
+    """Alert timestamps are stored as naive local time, aware values are converted to it before their offset is dropped"""
+
+    return timestamp.astimezone().replace(tzinfo=None) if timestamp.tzinfo else timestamp
+
+
+class ClosedBucketCache:
+    """
+    Cache of per-severity alert counts for buckets that are already closed.\n
+    Closed buckets only change when alerts with older timestamps are ingested or alerts are dismissed,
+    in which case the affected buckets are evicted.
+    """
+    
+    def __init__(self, maxsize: int = 100_000):
+        self._buckets = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        
+    def get(self, interval: str, bucket_start: datetime) -> Optional[Dict[str, int]]:
+        with self._lock:
+            return self._buckets.get((interval, bucket_start))
+    
+    def set(self, interval: str, bucket_start: datetime, counts: Dict[str, int]):
+        with self._lock:
+            self._buckets[(interval, bucket_start)] = counts
+    
+    def evict(self, timestamps: Iterable[datetime]):
+        """Evicts the buckets, of every interval, containing the given timestamps"""
+        
+        keys = {
+            (interval, AlertStatsService.floor_to_bucket(timestamp, interval))
+            for timestamp in timestamps if timestamp is not None
+            for interval in STATS_INTERVALS
+        }
+        with self._lock:
+            for key in keys:
+                self._buckets.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+closed_bucket_cache = ClosedBucketCache()
+
+
+class AlertStatsService:
+    
+    @classmethod
+    def floor_to_bucket(cls, timestamp: datetime, interval: str) -> datetime:
+        """Truncates a timestamp to the start of its bucket"""
+        
+        timestamp = timestamp.replace(second=0, microsecond=0, tzinfo=None)
+        if interval in ("hour", "day"):
+            timestamp = timestamp.replace(minute=0)
+        if interval == "day":
+            timestamp = timestamp.replace(hour=0)
+        return timestamp
+    
+    @classmethod
+    def _bucket_expression(cls, db: Session, interval: str):
+        if db.get_bind().dialect.name == "postgresql":
+            return func.date_trunc(interval, Alert.timestamp)
+        return func.strftime(SQLITE_BUCKET_FORMATS[interval], Alert.timestamp)
+    
+    @classmethod
+    def _parse_bucket(cls, value) -> datetime:
+        if isinstance(value, datetime):
+            return to_local_naive(value)
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    
+    @classmethod
+    def _count_buckets(
+        cls, 
+        db: Session, 
+        interval: str, 
+        start: datetime, 
+        end: datetime
+    ) -> Dict[datetime, Dict[str, int]]:
+        """
+        Counts alerts per bucket and severity between start and end with a single GROUP BY.\n
+        Ranges held by the hot window are counted in memory instead.
+        """
+        
+        if alert_hot_window.covers(start):
+            return alert_hot_window.count_buckets(start, end, STATS_INTERVALS[interval][0])
+        
+        bucket = cls._bucket_expression(db, interval).label("bucket")
+        rows = (
+            db.query(bucket, Alert.level_text, func.count())
+            .filter(
+                Alert.is_deleted == False,
+                Alert.timestamp >= start,
+                Alert.timestamp < end,
+            )
+            .group_by(bucket, Alert.level_text)
+            .all()
+        )
+        
+        counts: Dict[datetime, Dict[str, int]] = {}
+        for bucket_value, level_text, count in rows:
+            bucket_counts = counts.setdefault(cls._parse_bucket(bucket_value), {})
+            level_text = level_text or "unknown"
+            bucket_counts[level_text] = bucket_counts.get(level_text, 0) + count
+        return counts
+    
+    @classmethod
+    def get_alert_stats(
+        cls,
+        db: Session,
+        interval: str = "hour",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Returns alert counts bucketed by `interval` and split by severity.\n
+        Closed buckets are served from the cache, only missing buckets and the open one are counted in the database.
+        """
+        
+        if interval not in STATS_INTERVALS:
+            raise HTTPException(400, f"Interval must be one of {', '.join(STATS_INTERVALS)}")
+        
+        step, default_span = STATS_INTERVALS[interval]
+        now = datetime.now()
+        end = to_local_naive(end or now)
+        start = to_local_naive(start or end - default_span)
+        
+        if start >= end:
+            raise HTTPException(400, "Start date must be before end date")
+        if (end - start) / step > MAX_STATS_BUCKETS:
+            raise HTTPException(400, f"Too many buckets requested. Maximum is {MAX_STATS_BUCKETS}")
+        
+        bucket_starts: List[datetime] = []
+        bucket_start = cls.floor_to_bucket(start, interval)
+        while bucket_start < end:
+            bucket_starts.append(bucket_start)
+            bucket_start += step
+        
+        counts: Dict[datetime, Dict[str, int]] = {}
+        missing: List[datetime] = []
+        for bucket_start in bucket_starts:
+            cached = closed_bucket_cache.get(interval, bucket_start) if bucket_start + step <= now else None
+            if cached is None:
+                missing.append(bucket_start)
+            else:
+                counts[bucket_start] = cached
+        
+        if missing:
+            fetched = cls._count_buckets(db, interval, missing[0], missing[-1] + step)
+            for bucket_start in missing:
+                bucket_counts = fetched.get(bucket_start, {})
+                counts[bucket_start] = bucket_counts
+                
+                # The open bucket can still receive alerts and is never cached
+                if bucket_start + step <= now:
+                    closed_bucket_cache.set(interval, bucket_start, bucket_counts)
+        
+        return {
+            "interval": interval,
+            "start": bucket_starts[0].isoformat(),
+            "end": end.isoformat(),
+            "levels": SEVERITY_LEVELS,
+            "buckets": [
+                {
+                    "start": bucket_start.isoformat(),
+                    "total": sum(counts[bucket_start].values()),
+                    "counts": counts[bucket_start],
+                }
+                for bucket_start in bucket_starts
+            ],
+        }
+    
+    @classmethod
+    def get_top_values(
+        cls,
+        db: Session,
+        field: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        limit: int = 10,
+    ) -> List[Dict]:
+        """
+        Returns the `limit` most frequent values of an alert field between start and end.\n
+        Counts are aggregated by the database, the ranking keeps only `limit` groups in a heap instead of sorting them all.
+        """
+        
+        if field in INTERNED_FIELDS and alert_hot_window.covers(start):
+            return alert_hot_window.top(field, start, end, limit=limit)
+        
+        column = TOP_FIELDS[field]
+        query = db.query(column, func.count()).filter(
+            Alert.is_deleted == False,
+            Alert.timestamp >= start,
+            column.isnot(None),
+        )
+        if end is not None:
+            query = query.filter(Alert.timestamp < end)
+        query = query.group_by(column)
+        
+        key = ("top", limit) + query_cache.make_key(Alert.__tablename__, query)
+        top = query_cache.get(key)
+        if top is None:
+            top = heapq.nlargest(limit, query.yield_per(1000), key=lambda row: row[1])
+            top = [{"value": value, "count": count} for value, count in top]
+            query_cache.set(key, top)
+        return top
+    
+    @classmethod
+    def get_leaderboards(
+        cls,
+        db: Session,
+        fields: Optional[List[str]] = None,
+        hours: int = 24,
+        limit: int = 10,
+    ) -> dict:
+        """Returns the top-N source IPs, rules, hosts and users over the last `hours` hours"""
+        
+        fields = fields or list(TOP_FIELDS)
+        invalid_fields = [field for field in fields if field not in TOP_FIELDS]
+        if invalid_fields:
+            raise HTTPException(400, f"Fields must be in {', '.join(TOP_FIELDS)}")
+        if hours <= 0:
+            raise HTTPException(400, "Hours must be greater than 0")
+        
+        limit = max(1, min(limit, MAX_TOP_LIMIT))
+        
+        # Rounded to the minute so repeated requests share cached results
+        start = cls.floor_to_bucket(datetime.now() - timedelta(hours=hours), "minute")
+        
+        return {
+            "hours": hours,
+            "start": start.isoformat(),
+            "limit": limit,
+            "leaderboards": {
+                field: cls.get_top_values(db, field, start=start, limit=limit)
+                for field in fields
+            },
+        }
+    
+    @classmethod
+    def get_facets(cls, db: Session, filters: Optional[List] = None, limit: int = FACET_LIMIT) -> Dict[str, List[Dict]]:
+        """
+        Returns the `limit` most frequent values of every facet field among the alerts matching `filters`.\n
+        Every facet is a capped GROUP BY subquery and all of them are combined with UNION ALL, so the counts take a single round trip.
+        """
+        
+        where = and_(Alert.is_deleted == False, *(filters or []))
+        facet_queries = []
+        for name, column in FACET_FIELDS.items():
+            facet = (
+                select(
+                    literal(name).label("facet"),
+                    cast(column, String).label("value"),
+                    func.count().label("count"),
+                )
+                .where(where, column.isnot(None))
+                .group_by(column)
+                .order_by(func.count().desc())
+                .limit(limit)
+                .subquery()
+            )
+            facet_queries.append(select(facet))
+        
+        query = db.query(union_all(*facet_queries).subquery())
+        
+        key = ("facets",) + query_cache.make_key(Alert.__tablename__, query)
+        facets = query_cache.get(key)
+        if facets is None:
+            facets = {name: [] for name in FACET_FIELDS}
+            for name, value, count in query:
+                facets[name].append({"value": value, "count": count})
+            query_cache.set(key, facets)
+        return facets
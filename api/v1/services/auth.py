@@ -324,3 +324,10 @@ class AuthService:
         
         if not user.is_admin:
             raise HTTPException(403, "Permission denied")
+    
+    @classmethod
+    def ensure_admin(cls, user: Optional[User]):
+        """Checks that the user resolved by AuthMiddleware is an admin without looking them up again"""
+        
+        if user is None or not user.is_admin:
+            raise HTTPException(403, "Permission denied")
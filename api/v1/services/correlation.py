@@ -0,0 +1,186 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.services.ossec import ossec_service
+
+
+logger = create_logger(__name__)
+
+
+class CorrelationRule(NamedTuple):
+    """
+    Threshold rule evaluated over a sliding window of alerts sharing the same `key_field` value.\n
+    Without `distinct_field` the rule fires when `threshold` alerts fall inside the window,
+    with it the rule fires when the alerts of the window span `threshold` distinct values of that field.
+    """
+
+    name: str
+    key_field: str
+    threshold: int
+    window_seconds: int
+    description: str
+    min_level: int = 0
+    distinct_field: Optional[str] = None
+
+
+DEFAULT_CORRELATION_RULES = (
+    CorrelationRule(
+        name="repeated_source",
+        key_field="src_ip",
+        threshold=settings.CORRELATION_SOURCE_THRESHOLD,
+        window_seconds=settings.CORRELATION_SOURCE_WINDOW_SECONDS,
+        min_level=5,
+        description="{count} alerts of level 5 or more from source {key} within {window}s",
+    ),
+    CorrelationRule(
+        name="rule_spread",
+        key_field="rule_id",
+        threshold=settings.CORRELATION_SPREAD_THRESHOLD,
+        window_seconds=settings.CORRELATION_SPREAD_WINDOW_SECONDS,
+        distinct_field="hostname",
+        description="Rule {key} triggered on {count} hosts within {window}s",
+    ),
+)
+
+
+class _Window:
+    """Sliding window state of a single rule key"""
+
+    __slots__ = ("events", "last_seen", "max_level", "quiet_until")
+
+    def __init__(self, threshold: int, distinct: bool):
+        # Counting rules keep (timestamp, alert unique_id) capped at the threshold since older events can never matter,
+        # distinct rules keep distinct value -> (timestamp, alert unique_id) of its latest alert, oldest first
+        self.events = OrderedDict() if distinct else deque(maxlen=threshold)
+        self.last_seen = 0.0
+        self.max_level = 0
+        # A key that raised an incident stays quiet for one window so the same burst is reported once
+        self.quiet_until = 0.0
+
+
+class CorrelationEngine:
+    """
+    In-process correlation stage of alert ingestion.\n
+    Windows are driven by alert timestamps rather than the wall clock so backfilled alerts correlate the same way live ones do.
+    Keys are kept in last-seen order: keys whose window has passed are dropped from the front on every alert,
+    and each rule keeps at most `max_keys` keys, evicting the least recently seen ones.
+    """
+
+    def __init__(self, rules: Iterable[CorrelationRule] = DEFAULT_CORRELATION_RULES, max_keys: int = settings.CORRELATION_MAX_KEYS):
+        self.rules = tuple(rules)
+        self.max_keys = max_keys
+        self._windows = {rule.name: OrderedDict() for rule in self.rules}
+        self._lock = threading.Lock()
+
+    def process(self, alerts: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Feeds alert rows (as built by `AlertService.build_alert_row`) to every rule and returns the incidents they raised"""
+
+        events = []
+        for alert in alerts:
+            timestamp = alert.get("timestamp")
+            if timestamp is None:
+                continue
+            events.append((timestamp.timestamp(), alert))
+        # Files are synced per directory so a batch is not guaranteed to be in time order
+        events.sort(key=lambda event: event[0])
+
+        incidents = []
+        with self._lock:
+            for ts, alert in events:
+                level = alert.get("level") or 0
+                for rule in self.rules:
+                    if level < rule.min_level:
+                        continue
+                    key = alert.get(rule.key_field)
+                    if not key:
+                        continue
+                    incident = self._observe(rule, key, ts, level, alert)
+                    if incident:
+                        incidents.append(incident)
+
+        if incidents:
+            logger.info(f"Correlation raised {len(incidents)} incidents")
+        return incidents
+
+    def _observe(self, rule: CorrelationRule, key: str, ts: float, level: int, alert: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        windows = self._windows[rule.name]
+        distinct = rule.distinct_field is not None
+
+        self._expire(windows, ts - rule.window_seconds)
+
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = _Window(rule.threshold, distinct)
+            if len(windows) > self.max_keys:
+                windows.popitem(last=False)
+        else:
+            windows.move_to_end(key)
+
+        window.last_seen = max(window.last_seen, ts)
+        window.max_level = max(window.max_level, level)
+        cutoff = window.last_seen - rule.window_seconds
+
+        if distinct:
+            value = alert.get(rule.distinct_field)
+            if value:
+                window.events[value] = (ts, alert.get("unique_id"))
+                window.events.move_to_end(value)
+            while window.events and next(iter(window.events.values()))[0] < cutoff:
+                window.events.popitem(last=False)
+            count = len(window.events)
+        else:
+            window.events.append((ts, alert.get("unique_id")))
+            count = len(window.events) if window.events[0][0] >= cutoff else 0
+
+        if count < rule.threshold or ts < window.quiet_until:
+            return None
+
+        incident = self._build_incident(rule, key, count, window)
+        window.events.clear()
+        window.max_level = 0
+        window.quiet_until = ts + rule.window_seconds
+        return incident
+
+    @staticmethod
+    def _expire(windows: OrderedDict, cutoff: float):
+        """Drops the least recently seen keys whose window ended before `cutoff`"""
+
+        while windows:
+            window = next(iter(windows.values()))
+            if window.last_seen >= cutoff:
+                break
+            windows.popitem(last=False)
+
+    @staticmethod
+    def _build_incident(rule: CorrelationRule, key: str, count: int, window: _Window) -> Dict[str, Any]:
+        events = list(window.events.values()) if rule.distinct_field else list(window.events)
+        first_seen = min(ts for ts, _ in events)
+        return {
+            "kind": rule.name,
+            "key": str(key)[:256],
+            "description": rule.description.format(count=count, key=key, window=rule.window_seconds),
+            "level": window.max_level,
+            "level_text": ossec_service.get_ossec_level_text(window.max_level),
+            "alert_count": len(events),
+            "first_seen": datetime.fromtimestamp(first_seen).astimezone(),
+            "last_seen": datetime.fromtimestamp(window.last_seen).astimezone(),
+            "alert_ids": [unique_id for _, unique_id in events if unique_id],
+        }
+
+    def key_count(self) -> int:
+        """Number of keys currently held across all rules"""
+
+        with self._lock:
+            return sum(len(windows) for windows in self._windows.values())
+
+    def reset(self):
+        with self._lock:
+            for windows in self._windows.values():
+                windows.clear()
+
+
+correlation_engine = CorrelationEngine()
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import os
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+
+
+logger = create_logger(__name__)
+
+
+class FileStat(NamedTuple):
+    """Stat of a monitored file, formatted by the template rendering it"""
+
+    size: int
+    permissions: Optional[int]  # Permission bits
+    last_modified: Optional[float]  # Epoch
+
+
+# Stat of a file that does not exist (or cannot be stat'ed)
+MISSING_FILE_STAT = FileStat(size=0, permissions=None, last_modified=None)
+
+
+def stat_file(path: str) -> FileStat:
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return MISSING_FILE_STAT
+
+    return FileStat(size=st.st_size, permissions=st.st_mode & 0o777, last_modified=st.st_mtime)
+
+
+class FileStatCache:
+    """
+    TTL cache of the stat of monitored files, refreshed by a thread pool so requests never stat files themselves.\n
+    `get_many` returns what is cached, expired entries included, and queues the missing or expired paths.
+    It waits at most `wait_seconds` for them, so local files show up on the first render while a hung network mount
+    only leaves its files pending. A path is never queued twice while its stat is in flight.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = settings.FILE_STAT_TTL_SECONDS,
+        max_entries: int = settings.FILE_STAT_CACHE_SIZE,
+        workers: int = settings.FILE_STAT_WORKERS,
+        wait_seconds: float = settings.FILE_STAT_WAIT_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        # path -> (FileStat, monotonic time it was stat'ed), least recently stat'ed first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-stat")
+
+    def _refresh(self, path: str):
+        file_stat = stat_file(path)
+        with self._lock:
+            self._entries[path] = (file_stat, time.monotonic())
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._in_flight.pop(path, None)
+
+    def get_many(self, paths: Iterable[str]) -> Dict[str, Optional[FileStat]]:
+        """
+        Returns the stat of every path, None for the ones still being stat'ed.\n
+        Blocks up to `wait_seconds`, async callers run it with `run_in_threadpool`.
+        """
+
+        paths = list(paths)
+        now = time.monotonic()
+        pending = []
+        with self._lock:
+            for path in paths:
+                entry = self._entries.get(path)
+                if entry is not None and now - entry[1] < self.ttl_seconds:
+                    continue
+                future = self._in_flight.get(path)
+                if future is None:
+                    future = self._in_flight[path] = self._executor.submit(self._refresh, path)
+                pending.append(future)
+
+        if pending and self.wait_seconds > 0:
+            wait(pending, timeout=self.wait_seconds)
+
+        with self._lock:
+            return {path: self._entries[path][0] if path in self._entries else None for path in paths}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+file_stat_cache = FileStatCache()
@@ -0,0 +1,187 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import hashlib
+import mmap
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from api.db.database import get_db_with_ctx_manager
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.file_verification import FileVerification
+from api.v1.models.monitored_file import MonitoredFile
+from api.v1.services.monitored_file import hash_to_bytes
+from api.v1.services.syscheck_reader import LOCAL_AGENT
+
+
+logger = create_logger(__name__)
+
+VERIFICATION_RESULTS = ("match", "mismatch", "missing", "unreadable")
+
+# Files from this size on are hashed through mmap instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+# Bytes fed to the hashes at a time, large enough for hashlib to release the GIL while hashing
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Monitored files verified per batch, and per task of a worker
+VERIFY_BATCH_SIZE = 2000
+WORKER_SLICE_SIZE = 50
+
+
+def hash_file(path: str) -> Tuple[Tuple[int, int, int, int], bytes, bytes, bytes]:
+    """Returns the (dev, inode, mtime_ns, size) of a file and its sha256, md5 and sha1 digests, read in one pass"""
+
+    hashers = (hashlib.sha256(), hashlib.md5(), hashlib.sha1())
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                for start in range(0, len(view), HASH_CHUNK_SIZE):
+                    with view[start:start + HASH_CHUNK_SIZE] as chunk:
+                        for hasher in hashers:
+                            hasher.update(chunk)
+        else:
+            data = f.read()
+            for hasher in hashers:
+                hasher.update(data)
+
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+    return (key, *(hasher.digest() for hasher in hashers))
+
+
+def compare_hashes(md5: Optional[bytes], sha1: Optional[bytes], ossec_md5: Optional[str], ossec_sha1: Optional[str]) -> str:
+    """Compares local digests with the hex ones OSSEC recorded, hashes OSSEC did not record are not compared"""
+
+    for digest, recorded in ((md5, hash_to_bytes(ossec_md5)), (sha1, hash_to_bytes(ossec_sha1))):
+        if recorded is not None and digest != recorded:
+            return "mismatch"
+    return "match"
+
+
+class FileVerifier:
+    """
+    Re-hashes the files monitored on the manager with SHA-256, md5 and sha1 and checks them against the hashes OSSEC recorded.\n
+    Files are stat'ed and hashed by a thread pool: hashlib and file reads release the GIL, so a pass is bound by I/O.
+    Digests are cached in `file_verifications` under the (dev, inode, mtime, size) of the file,
+    a file whose stat did not change is compared from the cache without being read, and its row only rewritten
+    when the result changed.
+    """
+
+    _running = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def _verify_file(cls, file: tuple) -> Optional[Dict[str, Any]]:
+        """Returns the verification row of a file, None when its cached one is still accurate"""
+
+        file_id, path, ossec_md5, ossec_sha1, *cached_key, cached_sha256, cached_md5, cached_sha1, cached_result = file
+        row = {"file_id": file_id, "verified_at": datetime.now()}
+        try:
+            st = os.stat(path)
+            key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+            if cached_sha256 and list(key) == cached_key:
+                sha256, md5, sha1 = cached_sha256, cached_md5, cached_sha1
+                # OSSEC may have recorded new hashes since, the result is compared again
+                if compare_hashes(md5, sha1, ossec_md5, ossec_sha1) == cached_result:
+                    return None
+            else:
+                key, sha256, md5, sha1 = hash_file(path)
+        except FileNotFoundError:
+            return {**row, "result": "missing", "dev": None, "inode": None, "mtime_ns": None, "size": None,
+                    "sha256": None, "md5": None, "sha1": None}
+        except (OSError, ValueError):
+            return {**row, "result": "unreadable", "dev": None, "inode": None, "mtime_ns": None, "size": None,
+                    "sha256": None, "md5": None, "sha1": None}
+
+        dev, inode, mtime_ns, size = key
+        return {
+            **row,
+            "dev": dev, "inode": inode, "mtime_ns": mtime_ns, "size": size,
+            "sha256": sha256, "md5": md5, "sha1": sha1,
+            "result": compare_hashes(md5, sha1, ossec_md5, ossec_sha1),
+        }
+
+    @classmethod
+    def _verify_files(cls, files: List[tuple]) -> List[Optional[Dict[str, Any]]]:
+        return [cls._verify_file(file) for file in files]
+
+    @classmethod
+    def verify(cls, db: Session, workers: int = settings.FILE_VERIFY_WORKERS) -> Counter:
+        """Verifies every monitored file, returns the number of files per result"""
+
+        table = FileVerification.__table__
+        upsert = sqlite_insert(table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[table.c.file_id],
+            set_={column.name: upsert.excluded[column.name] for column in table.columns if column.name != "file_id"},
+        )
+        columns = (
+            MonitoredFile.id, MonitoredFile.path, MonitoredFile.md5, MonitoredFile.sha1,
+            FileVerification.dev, FileVerification.inode, FileVerification.mtime_ns, FileVerification.size,
+            FileVerification.sha256, FileVerification.md5, FileVerification.sha1, FileVerification.result,
+        )
+
+        results = Counter()
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-verify") as executor:
+            while True:
+                # Keyset pagination keeps each batch an index range scan
+                batch = db.execute(
+                    sa.select(*columns)
+                    .outerjoin(FileVerification, FileVerification.file_id == MonitoredFile.id)
+                    # Files monitored on agents are not on this host
+                    .where(MonitoredFile.agent == LOCAL_AGENT, MonitoredFile.id > last_id)
+                    .order_by(MonitoredFile.id)
+                    .limit(VERIFY_BATCH_SIZE)
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                # Files are handed to the workers in slices, a task per file costs more than stat'ing a cached one
+                slices = [batch[start:start + WORKER_SLICE_SIZE] for start in range(0, len(batch), WORKER_SLICE_SIZE)]
+                rows = []
+                for files, verified in zip(slices, executor.map(cls._verify_files, slices)):
+                    for file, row in zip(files, verified):
+                        results[row["result"] if row else file[-1]] += 1
+                        if row:
+                            rows.append(row)
+                if rows:
+                    db.execute(upsert, rows)
+                    db.commit()
+
+        # Drops the results of files no longer monitored
+        db.execute(sa.delete(table).where(
+            table.c.file_id.not_in(sa.select(MonitoredFile.id).where(MonitoredFile.agent == LOCAL_AGENT))
+        ))
+        db.commit()
+
+        logger.info(f"Verified {sum(results.values())} monitored files: {dict(results)}")
+        return results
+
+    @classmethod
+    def start(cls) -> bool:
+        """Runs a verification pass in a background thread, returns False when one is already running"""
+
+        with cls._lock:
+            if cls._running:
+                return False
+            cls._running = True
+
+        def run():
+            try:
+                with get_db_with_ctx_manager() as db:
+                    cls.verify(db)
+            except Exception as e:
+                logger.error(f"Error verifying monitored files: {e}")
+            finally:
+                cls._running = False
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
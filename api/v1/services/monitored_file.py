@@ -0,0 +1,315 @@
+from datetime import datetime
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from api.db.database import get_db_with_ctx_manager
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.file_verification import FileVerification
+from api.v1.models.monitored_file import MonitoredFile
+from api.v1.models.monitored_file_change import MonitoredFileChange
+from api.v1.services.ossec import DEFAULT_SYSCHECK_STATUS, SYSCHECK_RECORD_COLUMNS, SYSCHECK_STATUSES, SyscheckRecord
+from api.v1.services.path_tree import path_tree
+from api.v1.services.syscheck_reader import LOCAL_AGENT, SyscheckChanges, syscheck_databases
+
+
+logger = create_logger(__name__)
+
+# Columns taken from the syscheck database, a row is only rewritten when one of them changed
+SYNCED_COLUMNS = SYSCHECK_RECORD_COLUMNS
+
+# Rows per executemany when upserting, and paths per DELETE when dropping removed files
+SYNC_CHUNK_SIZE = 5000
+
+# Statuses the files page filters by, keyed by their lowercase form
+FILE_STATUSES = {status.lower(): status for status in [*SYSCHECK_STATUSES.values(), DEFAULT_SYSCHECK_STATUS]}
+
+# Trigram full-text index over the paths, serving substring searches. External content index:
+# `sync` indexes inserted rows in one statement, which is several times faster than a per-row insert trigger,
+# deletes and path updates are kept in sync by triggers
+PATH_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS monitored_files_fts USING fts5("
+    "path, content='monitored_files', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS monitored_files_fts_delete AFTER DELETE ON monitored_files BEGIN "
+    "INSERT INTO monitored_files_fts(monitored_files_fts, rowid, path) VALUES ('delete', old.id, old.path); END",
+    "CREATE TRIGGER IF NOT EXISTS monitored_files_fts_update AFTER UPDATE OF path ON monitored_files BEGIN "
+    "INSERT INTO monitored_files_fts(monitored_files_fts, rowid, path) VALUES ('delete', old.id, old.path); "
+    "INSERT INTO monitored_files_fts(rowid, path) VALUES (new.id, new.path); END",
+)
+
+# Shortest term the trigram index can match, shorter ones are searched with LIKE
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+
+def hash_to_bytes(value: Optional[str]) -> Optional[bytes]:
+    """Raw bytes of a hex checksum, None when it is missing or not hex"""
+
+    try:
+        return bytes.fromhex(value) if value else None
+    except ValueError:
+        return None
+
+
+class MonitoredFileService:
+
+    # Whether the trigram path index exists, checked once
+    _path_search_index: Optional[bool] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def ensure_path_search_index(cls, db: Session) -> bool:
+        """Creates the trigram path index if the SQLite build supports FTS5 trigrams, returns whether it is available"""
+
+        if cls._path_search_index is not None:
+            return cls._path_search_index
+
+        exists = db.execute(sa.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monitored_files_fts'"
+        )).first() is not None
+        if not exists:
+            try:
+                for statement in PATH_SEARCH_DDL:
+                    db.execute(sa.text(statement))
+                # Indexes the rows stored before the index existed
+                db.execute(sa.text("INSERT INTO monitored_files_fts(monitored_files_fts) VALUES ('rebuild')"))
+                db.commit()
+                exists = True
+            except OperationalError as e:
+                db.rollback()
+                logger.warning(f"Trigram path index unavailable, path searches will scan the table: {e}")
+
+        cls._path_search_index = exists
+        return exists
+
+    @classmethod
+    def refresh(cls, db: Session, full: bool = False) -> bool:
+        """
+        Syncs the table with what changed in the syscheck databases since the last refresh, `full` re-reads all of them.\n
+        An unchanged database costs a single stat. Returns whether it synced.
+        """
+
+        with cls._lock:
+            changes = syscheck_databases.poll(full=full)
+            if not changes:
+                return False
+            try:
+                cls.sync(db, changes)
+            except Exception:
+                db.rollback()
+                # The records read are lost, the next refresh reads every database again
+                syscheck_databases.reset()
+                raise
+            syscheck_databases.mark_synced(changes)
+        return True
+
+    @classmethod
+    def watch(cls, interval: int = settings.OSSEC_SYSCHECK_POLL_SECONDS):
+        """Refreshes the table every `interval` seconds, run in a background thread"""
+
+        while True:
+            try:
+                with get_db_with_ctx_manager() as db:
+                    cls.refresh(db)
+            except Exception as e:
+                logger.error(f"Error refreshing monitored files: {e}")
+            time.sleep(interval)
+
+    @classmethod
+    def sync(cls, db: Session, changes: Dict[str, SyscheckChanges]) -> Tuple[int, int]:
+        """
+        Upserts the syscheck records read from the database of each agent, keyed by agent.
+        The files a database read in full no longer lists are dropped.\n
+        Unchanged entries are not rewritten. Returns the number of rows inserted or updated and the number removed.
+        """
+
+        cls.ensure_path_search_index(db)
+
+        table = MonitoredFile.__table__
+        upsert = sqlite_insert(table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[table.c.agent, table.c.path],
+            set_={column: upsert.excluded[column] for column in SYNCED_COLUMNS},
+            where=sa.or_(*[table.c[column].is_distinct_from(upsert.excluded[column]) for column in SYNCED_COLUMNS]),
+        )
+
+        # Rows inserted by this sync get ids above the current highest one
+        last_id = db.query(sa.func.max(MonitoredFile.id)).scalar() or 0
+
+        synced = changed = transitions = removed = 0
+        # Per agent, (path, status) of the new files and of the ones whose status changed, and the removed paths
+        tree_changes = []
+        for agent, agent_changes in changes.items():
+            # Later entries of a path win
+            latest: Dict[str, SyscheckRecord] = {}
+            for record in agent_changes.records:
+                latest[record.path] = record
+
+            records = list(latest.values())
+            existing = db.query(sa.func.count()).filter(MonitoredFile.agent == agent).scalar() if agent_changes.full else 0
+            found = 0
+            tree_updates = []
+            for start in range(0, len(records), SYNC_CHUNK_SIZE):
+                chunk = records[start:start + SYNC_CHUNK_SIZE]
+                stored = {
+                    row.path: row for row in db.execute(
+                        sa.select(MonitoredFile.id, MonitoredFile.path, *[MonitoredFile.__table__.c[column] for column in SYNCED_COLUMNS])
+                        .where(MonitoredFile.agent == agent, MonitoredFile.path.in_([record.path for record in chunk]))
+                    )
+                }
+                found += len(stored)
+                # Most entries of a full read are unchanged, they are not sent to the database at all
+                chunk = [
+                    record.to_row(agent) for record in chunk
+                    if record.path not in stored or tuple(stored[record.path])[2:] != record.values()
+                ]
+                if not chunk:
+                    continue
+                transitions += cls._record_changes(db, chunk, stored)
+                tree_updates.extend(
+                    (row["path"], row["status"]) for row in chunk
+                    if row["path"] not in stored or stored[row["path"]].status != row["status"]
+                )
+                changed += db.execute(upsert, chunk).rowcount
+
+            removed_paths = []
+            # Files are only missing from a full read when fewer of the stored ones were found than there are
+            if agent_changes.full and found < existing:
+                removed_paths = [path for (path,) in db.query(MonitoredFile.path).filter(MonitoredFile.agent == agent) if path not in latest]
+            for start in range(0, len(removed_paths), SYNC_CHUNK_SIZE):
+                db.execute(sa.delete(table).where(
+                    table.c.agent == agent, table.c.path.in_(removed_paths[start:start + SYNC_CHUNK_SIZE])
+                ))
+
+            synced += len(records)
+            removed += len(removed_paths)
+            tree_changes.append((agent, tree_updates, removed_paths))
+
+        if cls._path_search_index:
+            db.execute(
+                sa.text("INSERT INTO monitored_files_fts(rowid, path) SELECT id, path FROM monitored_files WHERE id > :last_id"),
+                {"last_id": last_id}
+            )
+        db.commit()
+        for agent, tree_updates, removed_paths in tree_changes:
+            path_tree.apply(agent, tree_updates, removed_paths)
+
+        logger.info(
+            f"Synced {synced} monitored files of {len(changes)} agents: "
+            f"{changed} inserted or updated, {removed} removed, {transitions} checksum changes"
+        )
+        return changed, removed
+
+    @classmethod
+    def _record_changes(cls, db: Session, rows: List[Dict[str, Any]], stored: Dict[str, Any]) -> int:
+        """Appends a history row for each row whose checksums differ from the `stored` one, before it is upserted"""
+
+        changes = []
+        for row in rows:
+            current = stored.get(row["path"])
+            if current is None or (row["md5"], row["sha1"]) == (current.md5, current.sha1):
+                continue
+            changes.append({
+                "file_id": current.id,
+                "changed_at": row["last_check"] or datetime.now(),
+                "old_md5": hash_to_bytes(current.md5),
+                "new_md5": hash_to_bytes(row["md5"]),
+                "old_sha1": hash_to_bytes(current.sha1),
+                "new_sha1": hash_to_bytes(row["sha1"]),
+                "old_size": current.size,
+                "new_size": row["size"],
+            })
+
+        if changes:
+            db.execute(sa.insert(MonitoredFileChange.__table__), changes)
+        return len(changes)
+
+    @classmethod
+    def get_history(
+        cls,
+        db: Session,
+        path: str,
+        agent: str = LOCAL_AGENT,
+        page: int = 1,
+        per_page: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Returns a page of the checksum changes of a file monitored on an agent, latest first, and the number of changes"""
+
+        file_id = db.query(MonitoredFile.id).filter(MonitoredFile.agent == agent, MonitoredFile.path == path).scalar()
+        if file_id is None:
+            raise HTTPException(status_code=404, detail="Monitored file not found")
+
+        query = db.query(MonitoredFileChange).filter(MonitoredFileChange.file_id == file_id)
+        count = query.count()
+        changes = (
+            query.order_by(MonitoredFileChange.changed_at.desc(), MonitoredFileChange.id.desc())
+            .offset((max(page, 1) - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
+        return [change.to_dict() for change in changes], count
+
+    @classmethod
+    def build_filters(
+        cls,
+        db: Session,
+        path: Optional[str] = None,
+        prefix: Optional[str] = None,
+        status: Optional[str] = None,
+        verification: Optional[str] = None,
+        agent: Optional[str] = None,
+    ) -> list:
+        """
+        Builds the filter expressions of the files page.\n
+        `path` is a case-insensitive substring served by the trigram index, `prefix` a directory or path prefix
+        served by the path indexes, `status` one of the syscheck statuses,
+        `verification` the result of the last local verification (see `FileVerifier`), `agent` the agent monitoring the files.
+        """
+
+        filters = []
+        if path and path.strip():
+            term = path.strip()
+            if len(term) >= MIN_TRIGRAM_TERM_LENGTH and cls.ensure_path_search_index(db):
+                # Quoted as a single phrase so the term is matched as a substring, whatever characters it holds
+                phrase = '"' + term.replace('"', '""') + '"'
+                filters.append(MonitoredFile.id.in_(
+                    sa.select(sa.literal_column("rowid"))
+                    .select_from(sa.table("monitored_files_fts"))
+                    .where(sa.text("monitored_files_fts MATCH :path_phrase").bindparams(path_phrase=phrase))
+                ))
+            else:
+                filters.append(MonitoredFile.path.ilike(f"%{term}%"))
+        if prefix:
+            # Range scan on the path index, LIKE would not use it as it is case-insensitive
+            filters.append(sa.and_(MonitoredFile.path >= prefix, MonitoredFile.path < prefix + "\U0010ffff"))
+        if status:
+            filters.append(MonitoredFile.status == FILE_STATUSES.get(status.lower(), status))
+        if agent:
+            filters.append(MonitoredFile.agent == agent)
+        if verification:
+            filters.append(MonitoredFile.id.in_(
+                sa.select(FileVerification.file_id).where(FileVerification.result == verification.lower())
+            ))
+        return filters
+
+    @classmethod
+    def get_files(cls, db: Session, filters: List, page: int = 1, per_page: int = 20) -> Tuple[List[sa.Row], int]:
+        """
+        Returns a page of monitored files ordered by path with their verification, and the number of files matching `filters`.\n
+        Rows have the attributes of a `SyscheckRecord`, plus the id, agent and verification of the file.
+        """
+
+        query = (
+            db.query(*MonitoredFile.__table__.columns, FileVerification.sha256, FileVerification.result.label("verification"))
+            .outerjoin(FileVerification, FileVerification.file_id == MonitoredFile.id)
+            .filter(*filters)
+        )
+        count = query.count()
+        files = query.order_by(MonitoredFile.path, MonitoredFile.agent).offset((max(page, 1) - 1) * per_page).limit(per_page).all()
+        return files, count
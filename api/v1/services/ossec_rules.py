@@ -0,0 +1,264 @@
+from decimal import Decimal
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from api.db.database import get_db_with_ctx_manager
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.alert import Alert
+from api.v1.models.ossec_rule import OssecRule, OssecRuleFile, OssecRuleGroup
+
+
+logger = create_logger(__name__)
+
+# Group prefixes OSSEC uses to tag rules with compliance requirements
+COMPLIANCE_PREFIXES = ("pci_dss_", "gdpr_", "hipaa_", "nist_800_53_", "gpg13_", "tsc_", "cis_")
+
+# Elements naming the rules a rule is a child of
+PARENT_TAGS = ("if_sid", "if_matched_sid")
+
+# Rows written per INSERT when a rule file is stored
+INSERT_CHUNK_SIZE = 500
+
+_XML_DECLARATION = re.compile(r"<\?xml[^>]*\?>")
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    """Splits the comma (or space) separated lists OSSEC uses for groups and rule ids"""
+
+    if not value:
+        return []
+    return [item for item in re.split(r"[,\s]+", value) if item]
+
+
+def parse_rules_xml(text: str, file_path: str) -> List[Dict[str, Any]]:
+    """Parses the rules of a rule file to rows of the `ossec_rules` table, with their groups"""
+
+    # Rule files hold several top level <group> elements, they are wrapped in a root element to be well-formed XML
+    root = ET.fromstring(f"<rules>{_XML_DECLARATION.sub('', text)}</rules>")
+
+    rules = []
+    for group in root.iter("group"):
+        group_names = _split_list(group.get("name"))
+        for rule in group.findall("rule"):
+            rule_id = rule.get("id")
+            if not rule_id:
+                continue
+
+            groups = list(group_names)
+            for element in rule.findall("group"):
+                groups.extend(_split_list(element.text))
+            groups = list(dict.fromkeys(groups))
+
+            parent_ids = []
+            for tag in PARENT_TAGS:
+                for element in rule.findall(tag):
+                    parent_ids.extend(_split_list(element.text))
+
+            level = rule.get("level")
+            rules.append({
+                "rule_id": rule_id[:16],
+                "level": int(level) if level and level.isdigit() else 0,
+                "description": (rule.findtext("description") or "").strip()[:512] or None,
+                "groups": groups,
+                "compliance": [name for name in groups if name.startswith(COMPLIANCE_PREFIXES)],
+                "parent_ids": list(dict.fromkeys(parent_ids)),
+                "decoded_as": (rule.findtext("decoded_as") or "").strip()[:64] or None,
+                "file_path": file_path,
+            })
+    return rules
+
+
+class RulesCatalogue:
+    """
+    rule_id -> metadata index of the OSSEC rules, used to enrich alerts with their rule's groups and compliance tags.\n
+    Rule files are parsed once and stored, later refreshes only parse the files whose mtime changed
+    and drop the rules of removed files. Lookups are served from an in-memory dict loaded from the stored rules.
+    """
+
+    def __init__(self, rules_dir: str = settings.OSSEC_RULES_DIR, refresh_seconds: int = settings.OSSEC_RULES_REFRESH_SECONDS):
+        self.rules_dir = rules_dir
+        self.refresh_seconds = refresh_seconds
+        self._rules: Optional[Dict[str, Dict[str, Any]]] = None
+        self._last_refresh: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _list_rule_files(self) -> Optional[Dict[str, int]]:
+        """Returns the mtime in nanoseconds of every rule file, or None when the rules directory cannot be listed"""
+
+        try:
+            with os.scandir(self.rules_dir) as entries:
+                return {
+                    entry.path: entry.stat().st_mtime_ns
+                    for entry in entries if entry.name.endswith(".xml") and entry.is_file()
+                }
+        except FileNotFoundError:
+            return {}
+        except PermissionError:
+            pass
+
+        # The rules directory is usually only readable by root and the ossec group
+        result = subprocess.run(
+            ["sudo", "find", self.rules_dir, "-maxdepth", "1", "-type", "f", "-name", "*.xml", "-printf", "%T@ %p\\n"],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            logger.error(f"Failed to list {self.rules_dir}: {result.stderr.strip()}")
+            return None
+
+        files = {}
+        for line in result.stdout.splitlines():
+            mtime, _, path = line.partition(" ")
+            files[path] = int(Decimal(mtime) * 1_000_000_000)
+        return files
+
+    def _read_rule_file(self, path: str) -> str:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except PermissionError:
+            result = subprocess.run(["sudo", "cat", path], capture_output=True, text=True)
+            if result.returncode != 0:
+                raise PermissionError(f"Failed to read {path}: {result.stderr.strip()}")
+            return result.stdout
+
+    def refresh(self, db: Session, force: bool = False) -> int:
+        """
+        Parses the rule files added or changed since the last refresh, at most once every `refresh_seconds` unless `force`.
+        Returns the number of files parsed.
+        """
+
+        with self._lock:
+            if not force and self._last_refresh is not None and time.monotonic() - self._last_refresh < self.refresh_seconds:
+                return 0
+            self._last_refresh = time.monotonic()
+
+            files = self._list_rule_files()
+            if files is None:
+                if self._rules is None:
+                    self._load(db)
+                return 0
+
+            stored = dict(db.query(OssecRuleFile.path, OssecRuleFile.mtime_ns).all())
+            changed = sorted(path for path, mtime_ns in files.items() if stored.get(path) != mtime_ns)
+            removed = [path for path in stored if path not in files]
+
+            if changed or removed:
+                started = time.perf_counter()
+                self._store(db, changed, removed, files)
+                logger.info(
+                    f"Rules catalogue parsed {len(changed)} changed and dropped {len(removed)} removed rule files "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+
+            if self._rules is None or changed or removed:
+                self._load(db)
+            return len(changed)
+
+    def _store(self, db: Session, changed: List[str], removed: List[str], files: Dict[str, int]):
+        rules: Dict[str, Dict[str, Any]] = {}
+        for path in changed:
+            try:
+                for rule in parse_rules_xml(self._read_rule_file(path), path):
+                    rules[rule["rule_id"]] = rule
+            except (ET.ParseError, PermissionError) as e:
+                # Stored with its mtime anyway so a broken file is not parsed again until it changes
+                logger.error(f"Failed to parse rule file {path}: {e}")
+
+        stale_paths = changed + removed
+        stale_ids = sa.select(OssecRule.rule_id).where(OssecRule.file_path.in_(stale_paths))
+        db.execute(sa.delete(OssecRuleGroup).where(
+            sa.or_(OssecRuleGroup.rule_id.in_(stale_ids), OssecRuleGroup.rule_id.in_(list(rules)))
+        ))
+        db.execute(sa.delete(OssecRule).where(
+            sa.or_(OssecRule.file_path.in_(stale_paths), OssecRule.rule_id.in_(list(rules)))
+        ))
+        db.execute(sa.delete(OssecRuleFile).where(OssecRuleFile.path.in_(stale_paths)))
+
+        rows = list(rules.values())
+        groups = [
+            {"group_name": name[:128], "rule_id": rule["rule_id"]}
+            for rule in rows for name in rule["groups"]
+        ]
+        for table, values in ((OssecRule, rows), (OssecRuleGroup, groups)):
+            for start in range(0, len(values), INSERT_CHUNK_SIZE):
+                db.execute(sa.insert(table), values[start:start + INSERT_CHUNK_SIZE])
+        if changed:
+            db.execute(sa.insert(OssecRuleFile), [{"path": path, "mtime_ns": files[path]} for path in changed])
+        db.commit()
+
+    def _load(self, db: Session):
+        self._rules = {
+            rule.rule_id: {
+                "level": rule.level,
+                "description": rule.description,
+                "groups": rule.groups,
+                "compliance": rule.compliance,
+                "parent_ids": rule.parent_ids,
+                "decoded_as": rule.decoded_as,
+            }
+            for rule in db.query(OssecRule)
+        }
+        logger.info(f"Rules catalogue loaded {len(self._rules)} rules")
+
+    def warm(self):
+        """Refreshes the catalogue with its own session, run in a background thread on startup"""
+
+        try:
+            with get_db_with_ctx_manager() as db:
+                self.refresh(db, force=True)
+        except Exception as e:
+            logger.error(f"Failed to load the rules catalogue: {e}")
+
+    def watch(self):
+        """
+        Loads the catalogue, then picks up edited rule files every `refresh_seconds`, run in a background thread.
+        Requests only read the loaded rules, listing and parsing the rule files happens here.
+        """
+
+        self.warm()
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                with get_db_with_ctx_manager() as db:
+                    self.refresh(db, force=True)
+            except Exception as e:
+                logger.error(f"Failed to refresh the rules catalogue: {e}")
+
+    def get(self, rule_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Returns the metadata of a rule, None when the rule or the catalogue is not loaded"""
+
+        if self._rules is None or rule_id is None:
+            return None
+        return self._rules.get(str(rule_id))
+
+    def get_groups(self, rule_id: Optional[str]) -> Tuple[str, ...]:
+        rule = self.get(rule_id)
+        return tuple(rule["groups"]) if rule else ()
+
+    def enrich(self, alerts: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Adds the metadata of their rule to alert dicts under `rule`, by dictionary lookup"""
+
+        alerts = list(alerts)
+        for alert in alerts:
+            alert["rule"] = self.get(alert.get("rule_id"))
+        return alerts
+
+    @staticmethod
+    def build_group_filter(group: str):
+        """Filter expression matching the alerts of the rules in `group`, an index range scan on `ossec_rule_groups`"""
+
+        return Alert.rule_id.in_(
+            sa.select(OssecRuleGroup.rule_id).where(OssecRuleGroup.group_name == group)
+        )
+
+
+rules_catalogue = RulesCatalogue()
@@ -0,0 +1,254 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from api.db.database import get_db_with_ctx_manager
+from api.utils.loggers import create_logger
+from api.v1.models.monitored_file import MonitoredFile
+
+
+logger = create_logger(__name__)
+
+# Children returned by a browse at most, a directory can hold tens of thousands of files
+MAX_BROWSE_CHILDREN = 500
+
+
+class PathTreeNode:
+    """
+    Directory or file of the tree. Directories keep the number of files under them, in total and by status,
+    files only their status, so the many leaves hold no dicts. A path can be both when a file and a directory share it.
+    """
+
+    __slots__ = ("children", "files", "statuses", "status")
+
+    def __init__(self):
+        self.children: Optional[Dict[str, "PathTreeNode"]] = None
+        self.files = 0
+        self.statuses: Optional[Dict[str, int]] = None
+        self.status: Optional[str] = None
+
+    def count(self, status: str, delta: int):
+        self.files += delta
+        if self.statuses is None:
+            self.statuses = {}
+        count = self.statuses.get(status, 0) + delta
+        if count:
+            self.statuses[status] = count
+        else:
+            del self.statuses[status]
+
+
+
+def merge_nodes(name: str, path: str, nodes: List[PathTreeNode]) -> Dict[str, Any]:
+    """Describes the same path in the trees of one or more agents, with their counts added up"""
+
+    files, statuses, file_statuses = 0, {}, set()
+    for node in nodes:
+        files += node.files
+        for status, count in (node.statuses or {}).items():
+            statuses[status] = statuses.get(status, 0) + count
+        if node.status is not None:
+            files += 1
+            statuses[node.status] = statuses.get(node.status, 0) + 1
+            file_statuses.add(node.status)
+    return {
+        "name": name,
+        "path": path,
+        "is_file": bool(file_statuses),
+        "is_directory": any(node.children for node in nodes),
+        # Only set when the agents monitoring the file agree
+        "status": file_statuses.pop() if len(file_statuses) == 1 else None,
+        "files": files,
+        "statuses": statuses,
+    }
+
+
+def split_path(path: str) -> List[str]:
+    return [part for part in path.split("/") if part]
+
+
+class PathTree:
+    """
+    Prefix trees of the monitored paths, one per agent, with per-directory aggregates, so a directory and the counts
+    of its children are served in O(children) whatever the number of files under it.\n
+    Loaded from `monitored_files` on first use, then kept up to date by `MonitoredFileService.sync`.
+    Browsing all agents merges their trees at the browsed directory only.
+    """
+
+    def __init__(self):
+        self._roots: Optional[Dict[str, PathTreeNode]] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        """(Re)builds the trees from the monitored files table"""
+
+        with self._lock:
+            roots: Dict[str, PathTreeNode] = {}
+            query = db.query(MonitoredFile.agent, MonitoredFile.path, MonitoredFile.status)
+            for agent, path, status in query.yield_per(10000):
+                root = roots.get(agent)
+                if root is None:
+                    root = roots[agent] = PathTreeNode()
+                self._walk(root, path)[-1].status = status
+            for root in roots.values():
+                self._aggregate(root)
+            self._roots = roots
+            logger.info(f"Path tree loaded with {sum(root.files for root in roots.values())} files of {len(roots)} agents")
+
+    def warm(self):
+        try:
+            with get_db_with_ctx_manager() as db:
+                self.load(db)
+        except Exception as e:
+            logger.error(f"Error loading the path tree: {e}")
+
+    @staticmethod
+    def _walk(root: PathTreeNode, path: str) -> List[PathTreeNode]:
+        """Returns the nodes from the root to `path`, creating the missing ones"""
+
+        nodes = [root]
+        node = root
+        for part in split_path(path):
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = PathTreeNode()
+            nodes.append(child)
+            node = child
+        return nodes
+
+    @staticmethod
+    def _aggregate(root: PathTreeNode):
+        """Computes the counts of every directory in one post-order pass, cheaper than counting file by file"""
+
+        stack: List[Tuple[PathTreeNode, bool]] = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not node.children:
+                continue
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values() if child.children)
+                continue
+
+            files, statuses = 0, {}
+            for child in node.children.values():
+                if child.status is not None:
+                    files += 1
+                    statuses[child.status] = statuses.get(child.status, 0) + 1
+                if child.statuses:
+                    files += child.files
+                    for status, count in child.statuses.items():
+                        statuses[status] = statuses.get(status, 0) + count
+            node.files, node.statuses = files, statuses
+
+    def _set(self, root: PathTreeNode, path: str, status: str):
+        nodes = self._walk(root, path)
+        leaf = nodes[-1]
+        if leaf.status == status:
+            return
+        for node in nodes[:-1]:
+            if leaf.status is not None:
+                node.count(leaf.status, -1)
+            node.count(status, 1)
+        leaf.status = status
+
+    def _remove(self, root: PathTreeNode, path: str):
+        nodes, names = [root], []
+        for part in split_path(path):
+            child = nodes[-1].children.get(part) if nodes[-1].children else None
+            if child is None:
+                return
+            nodes.append(child)
+            names.append(part)
+
+        leaf = nodes[-1]
+        if leaf.status is None:
+            return
+        for node in nodes[:-1]:
+            node.count(leaf.status, -1)
+        leaf.status = None
+
+        # Prunes the nodes left without files
+        for depth in range(len(nodes) - 1, 0, -1):
+            if nodes[depth].files or nodes[depth].status is not None:
+                break
+            del nodes[depth - 1].children[names[depth - 1]]
+
+    def apply(self, agent: str, files: Iterable[Tuple[str, str]], removed_paths: Iterable[str] = ()):
+        """Applies the synced (path, status) pairs and removed paths of an agent, nothing to do while the trees are not loaded"""
+
+        with self._lock:
+            if self._roots is None:
+                return
+            root = self._roots.get(agent)
+            if root is None:
+                root = self._roots[agent] = PathTreeNode()
+            for path, status in files:
+                self._set(root, path, status)
+            for path in removed_paths:
+                self._remove(root, path)
+            if not root.files:
+                del self._roots[agent]
+
+    def agents(self, db: Session) -> List[str]:
+        """Agents with monitored files"""
+
+        if self._roots is None:
+            self.load(db)
+        with self._lock:
+            return sorted(self._roots)
+
+    def browse(
+        self,
+        db: Session,
+        path: str = "/",
+        agent: Optional[str] = None,
+        limit: int = MAX_BROWSE_CHILDREN,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns a directory with its aggregates and its children, directories first, on one agent or all of them.
+        None when nothing is under it.
+        """
+
+        if self._roots is None:
+            self.load(db)
+
+        with self._lock:
+            parts = split_path(path)
+            roots = [self._roots[agent]] if agent in self._roots else [] if agent else list(self._roots.values())
+            nodes = []
+            for node in roots:
+                for part in parts:
+                    node = node.children.get(part) if node.children else None
+                    if node is None:
+                        break
+                else:
+                    nodes.append(node)
+            if not nodes:
+                return None
+
+            children: Dict[str, List[PathTreeNode]] = {}
+            for node in nodes:
+                for name, child in (node.children or {}).items():
+                    children.setdefault(name, []).append(child)
+
+            base = "/" + "/".join(parts)
+            names = sorted(children, key=lambda name: (not any(child.children for child in children[name]), name))
+            return {
+                **merge_nodes(parts[-1] if parts else "/", base, nodes),
+                "agent": agent,
+                "children_count": len(names),
+                "children": [
+                    merge_nodes(name, f"{base.rstrip('/')}/{name}", children[name]) for name in names[:limit]
+                ],
+            }
+
+    def invalidate(self):
+        with self._lock:
+            self._roots = None
+
+
+path_tree = PathTree()
@@ -0,0 +1,257 @@
+from collections import Counter
+from datetime import datetime
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from api.utils.loggers import create_logger
+from api.utils.settings import settings
+from api.v1.models.rate_baseline import RateBaseline
+from api.v1.services.ossec import ossec_service
+
+
+logger = create_logger(__name__)
+
+# Baseline scopes and the alert field each one is keyed by
+RATE_SCOPES = {
+    "rule": "rule_id",
+    "host": "hostname",
+}
+
+
+class _Baseline:
+    """In-memory state of a `RateBaseline` row"""
+
+    __slots__ = ("id", "mean", "variance", "samples", "bucket", "count", "max_level", "flagged", "new")
+
+    def __init__(self, id: str, mean: float = 0.0, variance: float = 0.0, samples: int = 0, bucket: Optional[int] = None, count: int = 0, new: bool = True):
+        self.id = id
+        self.mean = mean
+        self.variance = variance
+        self.samples = samples
+        self.bucket = bucket
+        self.count = count
+        self.max_level = 0
+        self.flagged = False
+        self.new = new
+
+    def fold(self, value: float, alpha: float):
+        """Folds one closed bucket into the exponentially weighted mean and variance in O(1)"""
+
+        if self.samples == 0:
+            # Seeded with the first bucket rather than biased towards 0
+            self.mean = value
+            self.samples = 1
+            return
+
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.samples += 1
+
+    def fold_empty(self, buckets: int, alpha: float):
+        """Folds `buckets` empty buckets in O(1), the closed form of as many `fold(0)` calls"""
+
+        if buckets <= 0:
+            return
+        if self.samples == 0:
+            self.fold(0, alpha)
+            buckets -= 1
+
+        # Each empty bucket scales the mean by (1 - alpha), the variance decays with it and absorbs the drop of the mean
+        decay = (1 - alpha) ** buckets
+        self.variance = decay * (self.variance + self.mean * self.mean * (1 - decay))
+        self.mean *= decay
+        self.samples += buckets
+
+    def std(self) -> float:
+        # Alert counts are at least as noisy as a Poisson process, which keeps a flat baseline from flagging +1 alert
+        return max(math.sqrt(self.variance), math.sqrt(self.mean), 1.0)
+
+
+class RateAnomalyDetector:
+    """
+    Flags rules and hosts whose alert rate in a bucket deviates from their exponentially weighted baseline.\n
+    Ingested alerts are rolled up per key and bucket, then every bucket updates its baseline in O(1):
+    a bucket is folded into the mean and variance when a later one starts, and empty buckets in between are folded in lazily.
+    The open bucket is checked as it fills so a burst is flagged without waiting for the bucket to close.
+    Baselines are persisted after every batch so restarts keep them.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = settings.RATE_ANOMALY_BUCKET_SECONDS,
+        alpha: float = settings.RATE_ANOMALY_ALPHA,
+        z_threshold: float = settings.RATE_ANOMALY_Z_THRESHOLD,
+        min_samples: int = settings.RATE_ANOMALY_MIN_SAMPLES,
+        min_count: int = settings.RATE_ANOMALY_MIN_COUNT,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.min_count = min_count
+        self._baselines: Optional[Dict[Tuple[str, str], _Baseline]] = None
+        # Keys changed since the baselines were last persisted
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session):
+        self._baselines = {}
+        for row in db.query(RateBaseline).filter(RateBaseline.is_deleted == False):
+            self._baselines[(row.scope, row.key)] = _Baseline(
+                id=row.id,
+                mean=row.mean,
+                variance=row.variance,
+                samples=row.samples,
+                bucket=int(row.bucket_start.timestamp()) // self.bucket_seconds if row.bucket_start else None,
+                count=row.bucket_count,
+                new=False,
+            )
+        logger.info(f"Loaded {len(self._baselines)} alert rate baselines")
+
+    def process(self, db: Session, alerts: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Feeds alert rows (as built by `AlertService.build_alert_row`) to the baselines and returns the rate anomaly incidents raised"""
+
+        rollup: Counter = Counter()
+        max_levels: Dict[tuple, int] = {}
+        for alert in alerts:
+            timestamp = alert.get("timestamp")
+            if timestamp is None:
+                continue
+            bucket = int(timestamp.replace(tzinfo=None).timestamp()) // self.bucket_seconds
+            for scope, field in RATE_SCOPES.items():
+                key = alert.get(field)
+                if key:
+                    cell = (scope, str(key)[:256], bucket)
+                    rollup[cell] += 1
+                    max_levels[cell] = max(max_levels.get(cell, 0), alert.get("level") or 0)
+
+        if not rollup:
+            return []
+
+        incidents = []
+        with self._lock:
+            if self._baselines is None:
+                self._load(db)
+
+            # Buckets of a key are applied in time order
+            for (scope, key, bucket), count in sorted(rollup.items(), key=lambda item: item[0][2]):
+                incident = self._observe(scope, key, bucket, count, max_levels[(scope, key, bucket)])
+                if incident:
+                    incidents.append(incident)
+
+            self._persist(db)
+
+        if incidents:
+            logger.info(f"Rate anomaly detection raised {len(incidents)} incidents")
+        return incidents
+
+    def _observe(self, scope: str, key: str, bucket: int, count: int, max_level: int) -> Optional[Dict[str, Any]]:
+        baseline = self._baselines.get((scope, key))
+        if baseline is None:
+            baseline = self._baselines[(scope, key)] = _Baseline(id=uuid4().hex, bucket=bucket)
+
+        if baseline.bucket is None:
+            baseline.bucket = bucket
+        elif bucket > baseline.bucket:
+            baseline.fold(baseline.count, self.alpha)
+            baseline.fold_empty(bucket - baseline.bucket - 1, self.alpha)
+            baseline.bucket = bucket
+            baseline.count = 0
+            baseline.max_level = 0
+            baseline.flagged = False
+        elif bucket < baseline.bucket:
+            # Late alerts of an already folded bucket do not rewrite the baseline
+            return None
+
+        baseline.count += count
+        baseline.max_level = max(baseline.max_level, max_level)
+        self._dirty.add((scope, key))
+
+        if baseline.flagged or baseline.samples < self.min_samples or baseline.count < self.min_count:
+            return None
+
+        z_score = (baseline.count - baseline.mean) / baseline.std()
+        if z_score < self.z_threshold:
+            return None
+
+        baseline.flagged = True
+        return self._build_incident(scope, key, baseline, z_score)
+
+    def _bucket_time(self, bucket: int) -> datetime:
+        """Start of a bucket, timezone aware like the times written by the correlation engine"""
+
+        return datetime.fromtimestamp(bucket * self.bucket_seconds).astimezone()
+
+    def _build_incident(self, scope: str, key: str, baseline: _Baseline, z_score: float) -> Dict[str, Any]:
+        ratio = baseline.count / max(baseline.mean, 0.1)
+        return {
+            "kind": f"{scope}_rate_anomaly",
+            "key": key,
+            "description": (
+                f"{scope.capitalize()} {key} raised {baseline.count} alerts in {self.bucket_seconds // 60} minutes, "
+                f"{ratio:.1f}x its baseline of {baseline.mean:.1f} (z-score {z_score:.1f})"
+            ),
+            "level": baseline.max_level,
+            "level_text": ossec_service.get_ossec_level_text(baseline.max_level),
+            "alert_count": baseline.count,
+            "first_seen": self._bucket_time(baseline.bucket),
+            "last_seen": self._bucket_time(baseline.bucket + 1),
+            "alert_ids": None,
+        }
+
+    def _persist(self, db: Session):
+        """Writes the baselines changed by the last batch, one bulk INSERT for new keys and one executemany UPDATE for the others.
+
+        A failed write is logged rather than raised, the alerts are already committed and the rest of ingestion still runs.
+        """
+
+        created, updated, new_baselines = [], [], []
+        for scope, key in self._dirty:
+            baseline = self._baselines[(scope, key)]
+            values = {
+                "id": baseline.id,
+                "mean": baseline.mean,
+                "variance": baseline.variance,
+                "samples": baseline.samples,
+                "bucket_start": self._bucket_time(baseline.bucket),
+                "bucket_count": baseline.count,
+            }
+            if baseline.new:
+                created.append({**values, "scope": scope, "key": key})
+                new_baselines.append(baseline)
+            else:
+                updated.append(values)
+
+        try:
+            if created:
+                RateBaseline.bulk_create(db, created, commit=False)
+            if updated:
+                # Bulk UPDATE by primary key
+                db.execute(update(RateBaseline), updated)
+            db.commit()
+        except Exception as e:
+            # The keys stay dirty and the new baselines new, so the next batch writes them again
+            db.rollback()
+            logger.error(f"Failed to persist alert rate baselines: {e}")
+            return
+
+        for baseline in new_baselines:
+            baseline.new = False
+        self._dirty.clear()
+
+    def reset(self):
+        """Drops the in-memory baselines, they are reloaded from the database on the next batch"""
+
+        with self._lock:
+            self._baselines = None
+            self._dirty.clear()
+
+
+rate_anomaly_detector = RateAnomalyDetector()
@@ -0,0 +1,208 @@
+from collections import Counter
+from datetime import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+import sqlalchemy as sa
+from sqlalchemy import and_, bindparam, func
+from sqlalchemy.orm import Session
+
+from api.utils.loggers import create_logger
+from api.v1.models.alert import Alert
+from api.v1.models.saved_search import SavedSearch, SavedSearchMatch
+from api.v1.services.ossec_rules import rules_catalogue
+
+
+logger = create_logger(__name__)
+
+# Alerts page filters a saved search can hold
+SAVED_SEARCH_FIELDS = ("q", "severity", "start", "end", "group", "hostname", "rule_id", "user", "log_file_path")
+
+# Alert fields the free-text filter looks into, as in `AlertService.build_search_filter`
+SEARCH_TEXT_FIELDS = ("description", "hostname", "rule_id", "user", "src_ip")
+
+# Exact-match filters and the alert field they compare
+EXACT_FIELDS = {
+    "severity": "level_text",
+    "hostname": "hostname",
+    "rule_id": "rule_id",
+    "user": "user",
+    "log_file_path": "log_file_path",
+}
+
+MAX_SAVED_SEARCHES_PER_USER = 50
+
+
+def _naive(timestamp: datetime) -> datetime:
+    return timestamp.replace(tzinfo=None)
+
+
+def compile_predicate(filters: Dict[str, str]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compiles saved search filters to a Python predicate over alert rows (as built by `AlertService.build_alert_row`).\n
+    It matches the same alerts as the SQL filters of `AlertService.build_alert_filters`.
+    """
+
+    checks = []
+
+    term = (filters.get("q") or "").strip().lower()
+    if term:
+        checks.append(lambda row: any(term in str(row.get(field) or "").lower() for field in SEARCH_TEXT_FIELDS))
+
+    group = filters.get("group")
+    if group:
+        checks.append(lambda row: group in rules_catalogue.get_groups(row.get("rule_id")))
+
+    for name, field in EXACT_FIELDS.items():
+        value = filters.get(name)
+        if value:
+            checks.append(lambda row, field=field, value=value: row.get(field) is not None and str(row.get(field)) == value)
+
+    if filters.get("start"):
+        start = _naive(datetime.fromisoformat(filters["start"]))
+        checks.append(lambda row: row.get("timestamp") is not None and _naive(row["timestamp"]) >= start)
+    if filters.get("end"):
+        end = _naive(datetime.fromisoformat(filters["end"]))
+        checks.append(lambda row: row.get("timestamp") is not None and _naive(row["timestamp"]) < end)
+
+    return lambda row: all(check(row) for check in checks)
+
+
+class SavedSearchService:
+
+    # (saved search id, predicate) of every saved search, compiled on first use and dropped when searches change
+    _predicates: Optional[List[Tuple[str, Callable]]] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def clean_filters(cls, filters: Dict[str, Optional[str]]) -> Dict[str, str]:
+        return {name: value.strip() for name, value in filters.items() if name in SAVED_SEARCH_FIELDS and value and value.strip()}
+
+    @classmethod
+    def invalidate_predicates(cls):
+        with cls._lock:
+            cls._predicates = None
+
+    @classmethod
+    def _get_predicates(cls, db: Session) -> List[Tuple[str, Callable]]:
+        with cls._lock:
+            if cls._predicates is None:
+                searches = db.query(SavedSearch.id, SavedSearch.filters).filter(SavedSearch.is_deleted == False).all()
+                cls._predicates = [(search_id, compile_predicate(filters)) for search_id, filters in searches]
+            return cls._predicates
+
+    @classmethod
+    def create(cls, db: Session, user_id: str, name: str, filters: Dict[str, str], filter_exprs: List) -> SavedSearch:
+        """
+        Saves a search and fills its result set from the alerts already stored.\n
+        `filter_exprs` are the SQL filters of `filters` (see `AlertService.build_alert_filters`), used once for the backfill.
+        """
+
+        if not name or not name.strip():
+            raise HTTPException(400, "Saved search name is required")
+
+        saved_count = db.query(func.count(SavedSearch.id)).filter(
+            SavedSearch.user_id == user_id,
+            SavedSearch.is_deleted == False,
+        ).scalar()
+        if saved_count >= MAX_SAVED_SEARCHES_PER_USER:
+            raise HTTPException(400, f"You can only have {MAX_SAVED_SEARCHES_PER_USER} saved searches")
+
+        search = SavedSearch.create(db, commit=False, name=name.strip()[:128], user_id=user_id, filters=filters, match_count=0)
+        db.flush()
+
+        # Backfill with a single INSERT ... SELECT, the alerts never leave the database
+        backfill = sa.insert(SavedSearchMatch).from_select(
+            ["saved_search_id", "alert_id", "timestamp"],
+            sa.select(sa.literal(search.id), Alert.id, Alert.timestamp).where(
+                and_(Alert.is_deleted == False, *filter_exprs)
+            )
+        )
+        db.execute(backfill)
+        search.match_count = db.query(func.count()).filter(SavedSearchMatch.saved_search_id == search.id).scalar()
+        db.commit()
+        db.refresh(search)
+
+        cls.invalidate_predicates()
+        return search
+
+    @classmethod
+    def delete(cls, db: Session, search: SavedSearch):
+        db.execute(sa.delete(SavedSearchMatch).where(SavedSearchMatch.saved_search_id == search.id))
+        db.delete(search)
+        db.commit()
+        cls.invalidate_predicates()
+
+    @classmethod
+    def get_user_searches(cls, db: Session, user_id: str) -> List[Dict[str, Any]]:
+        rows = (
+            db.query(SavedSearch.id, SavedSearch.name, SavedSearch.match_count)
+            .filter(SavedSearch.user_id == user_id, SavedSearch.is_deleted == False)
+            .order_by(SavedSearch.name)
+            .all()
+        )
+        return [row._asdict() for row in rows]
+
+    @classmethod
+    def match_alerts(cls, db: Session, rows: List[Dict[str, Any]]) -> int:
+        """Evaluates newly ingested alert rows against every saved search and adds them to the matching result sets"""
+
+        predicates = cls._get_predicates(db)
+        if not predicates or not rows:
+            return 0
+
+        matches = []
+        counts: Counter = Counter()
+        for row in rows:
+            for search_id, predicate in predicates:
+                if predicate(row):
+                    matches.append({"saved_search_id": search_id, "alert_id": row["id"], "timestamp": row["timestamp"]})
+                    counts[search_id] += 1
+
+        if not matches:
+            return 0
+
+        db.execute(sa.insert(SavedSearchMatch), matches)
+        db.execute(
+            sa.update(SavedSearch.__table__)
+            .where(SavedSearch.__table__.c.id == bindparam("search_id"))
+            .values(match_count=SavedSearch.__table__.c.match_count + bindparam("matched")),
+            [{"search_id": search_id, "matched": matched} for search_id, matched in counts.items()]
+        )
+        SavedSearch._mark_table_written(db)
+        db.commit()
+        return len(matches)
+
+    @classmethod
+    def prune_deleted_alerts(cls, db: Session):
+        """Drops dismissed alerts from every result set and recounts the saved searches"""
+
+        deleted_ids = sa.select(Alert.id).where(Alert.is_deleted == True)
+        db.execute(sa.delete(SavedSearchMatch).where(SavedSearchMatch.alert_id.in_(deleted_ids)))
+        db.execute(
+            sa.update(SavedSearch.__table__).values(
+                match_count=sa.select(func.count())
+                .where(SavedSearchMatch.saved_search_id == SavedSearch.__table__.c.id)
+                .scalar_subquery()
+            )
+        )
+        SavedSearch._mark_table_written(db)
+        db.commit()
+
+    @classmethod
+    def get_results(cls, db: Session, search: SavedSearch, page: int = 1, per_page: int = 20) -> List:
+        """Returns a page of a saved search's alerts, read from its result set through the (search, timestamp) index"""
+
+        page = max(page, 1)
+        return (
+            db.query(*Alert.list_columns())
+            .join(
+                SavedSearchMatch,
+                and_(SavedSearchMatch.alert_id == Alert.id, SavedSearchMatch.saved_search_id == search.id)
+            )
+            .order_by(SavedSearchMatch.timestamp.desc())
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
@@ -0,0 +1,258 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from api.utils.loggers import create_logger
+from api.utils.settings import BASE_DIR, settings
+from api.v1.services.ossec import SyscheckRecord, parse_syscheck_line
+
+
+logger = create_logger(__name__)
+
+# Copy of the syscheck database made by `scripts/sync_monitored_files.sh`, read when the live one is not readable
+SYSCHECK_SNAPSHOT_FILE = f"{BASE_DIR}/logs/syscheck"
+
+# Bytes read per pread
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Agent key of the manager's own database, `syscheck` in the queue directory
+LOCAL_AGENT = "local"
+# Databases of the agents, eg `(web-01) 10.0.0.5->syscheck`. Registry databases of Windows agents are not files
+AGENT_DATABASE_PATTERN = re.compile(r"^\((?P<agent>.+)\) (?P<ip>\S+)->syscheck$")
+
+
+class SyscheckChanges(NamedTuple):
+    """Records read by a poll. When `full` they are the whole database, otherwise only the appended entries"""
+
+    records: List[SyscheckRecord]
+    full: bool
+
+
+class SyscheckReader:
+    """
+    Incremental reader of an OSSEC syscheck database.\n
+    The file is kept open and its (inode, size, mtime) checked on every poll, so an unchanged database costs one stat.
+    The database is append-mostly: when it grew only the appended bytes are read with pread.
+    It is read in full when it was replaced, truncated or rewritten in place (same size, new mtime),
+    and every `full_sync_seconds` to pick up status flags updated in place while entries were appended.
+    Access comes from group permissions on the OSSEC queue (see `scripts/grant_access.sh`), not sudo.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.OSSEC_SYSCHECK_FILE,
+        fallback_path: Optional[str] = SYSCHECK_SNAPSHOT_FILE,
+        full_sync_seconds: int = settings.OSSEC_SYSCHECK_FULL_SYNC_SECONDS,
+    ):
+        self.path = path
+        self.fallback_path = fallback_path
+        self.full_sync_seconds = full_sync_seconds
+        self._fd: Optional[int] = None
+        self._source: Optional[str] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        # Bytes consumed, always just past a "\n"
+        self._offset = 0
+        self._last_full_sync: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def source(self) -> Optional[str]:
+        """Path of the database being read"""
+
+        return self._source
+
+    def live_readable(self) -> bool:
+        """Whether the live database can be read without sudo"""
+
+        return os.access(self.path, os.R_OK)
+
+    def _open(self) -> bool:
+        self._close()
+        for path in (self.path, self.fallback_path):
+            if not path:
+                continue
+            try:
+                self._fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            except PermissionError:
+                logger.warning(f"No read access to {path}, run scripts/grant_access.sh to read it without sudo")
+                continue
+
+            if path != self._source:
+                logger.info(f"Reading syscheck database from {path}")
+            self._source = path
+            return True
+
+        self._source = None
+        return False
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def reset(self):
+        """Forgets what was read, the next poll reads the whole database"""
+
+        with self._lock:
+            self._close()
+            self._signature = None
+            self._offset = 0
+
+    def _read_lines(self, start: int, end: int) -> Iterator[Tuple[str, int]]:
+        """Yields the complete lines between `start` and `end` with the offset just past each of them"""
+
+        position, remainder = start, b""
+        while position < end:
+            chunk = os.pread(self._fd, min(READ_CHUNK_SIZE, end - position), position)
+            if not chunk:
+                break
+            position += len(chunk)
+
+            lines = (remainder + chunk).split(b"\n")
+            remainder = lines.pop()
+            line_end = position - len(remainder)
+            # Offsets are only needed for the last line of a chunk
+            for line in lines[:-1]:
+                yield line.decode("utf-8", errors="replace"), -1
+            if lines:
+                yield lines[-1].decode("utf-8", errors="replace"), line_end
+
+    def poll(self, full: bool = False) -> Optional[SyscheckChanges]:
+        """Returns the records added or changed since the last poll, None when the database did not change"""
+
+        with self._lock:
+            if self._fd is None or (full and self._source != self.path):
+                if not self._open():
+                    return None
+
+            try:
+                st = os.stat(self._source)
+            except FileNotFoundError:
+                self._close()
+                return None
+
+            signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+            due = self._last_full_sync is None or time.monotonic() - self._last_full_sync >= self.full_sync_seconds
+            if signature == self._signature and not full and not due:
+                return None
+
+            if self._signature is None or st.st_ino != self._signature[0]:
+                # First poll or the database was replaced
+                if not self._open():
+                    return None
+                full = True
+            elif st.st_size < self._offset or st.st_size == self._signature[1]:
+                # Truncated, or rewritten in place without growing
+                full = True
+            elif self._offset and os.pread(self._fd, 1, self._offset - 1) != b"\n":
+                # What was read is no longer a line boundary
+                full = True
+            full = full or due
+
+            start = 0 if full else self._offset
+            records, offset = [], start
+            for line, line_end in self._read_lines(start, st.st_size):
+                record = parse_syscheck_line(line.strip())
+                if record:
+                    records.append(record)
+                if line_end >= 0:
+                    offset = line_end
+
+            self._offset = offset
+            self._signature = signature
+            if full:
+                self._last_full_sync = time.monotonic()
+            return SyscheckChanges(records=records, full=full)
+
+
+class SyscheckDatabases:
+    """
+    Readers of every syscheck database of the manager: its own and one per agent, found in the queue directory.\n
+    The directory is only listed again when its mtime changes, and the databases are polled by a thread pool.
+    A database that disappeared is reported as an empty full read, so the entries of its agent are dropped,
+    on every poll until a sync confirms it with `mark_synced`.
+    """
+
+    def __init__(self, local_path: str = settings.OSSEC_SYSCHECK_FILE, workers: int = settings.OSSEC_SYSCHECK_WORKERS):
+        self.directory = os.path.dirname(local_path)
+        self.local_reader = SyscheckReader(path=local_path)
+        self.workers = workers
+        self._readers: Dict[str, SyscheckReader] = {}
+        # Agents whose database disappeared and whose entries no sync has dropped yet
+        self._removed: Set[str] = set()
+        self._directory_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="syscheck-reader")
+
+    def _discover(self):
+        """Updates the agent readers when the directory changed"""
+
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self._directory_mtime:
+            return
+
+        agents = {}
+        try:
+            for name in os.listdir(self.directory):
+                match = AGENT_DATABASE_PATTERN.match(name)
+                if match:
+                    agents[match.group("agent")] = os.path.join(self.directory, name)
+        except OSError:
+            # Not readable, only the local database is read, from its snapshot if need be
+            pass
+        self._directory_mtime = mtime
+
+        known = set(self._readers)
+        for agent in list(self._readers):
+            if agents.get(agent) != self._readers[agent].path:
+                self._readers.pop(agent).reset()
+                self._removed.add(agent)
+        for agent, path in agents.items():
+            if agent not in self._readers and agent != LOCAL_AGENT:
+                self._readers[agent] = SyscheckReader(path=path, fallback_path=None)
+                # Moved to a new address, the full read of the new database replaces its entries
+                self._removed.discard(agent)
+        if known != set(self._readers):
+            logger.info(f"Reading the syscheck databases of {len(self._readers)} agents")
+
+    def poll(self, full: bool = False) -> Dict[str, SyscheckChanges]:
+        """Returns the changes of every database that changed since the last poll, keyed by agent"""
+
+        with self._lock:
+            self._discover()
+            changes = {agent: SyscheckChanges(records=[], full=True) for agent in self._removed}
+            readers = {LOCAL_AGENT: self.local_reader, **self._readers}
+
+        results = self._executor.map(lambda reader: reader.poll(full=full), readers.values())
+        for agent, result in zip(readers, results):
+            if result is not None:
+                changes[agent] = result
+        return changes
+
+    def mark_synced(self, agents: Iterable[str]):
+        """Called once the changes of a poll are committed, the removed agents among them are not reported again"""
+
+        with self._lock:
+            self._removed.difference_update(agents)
+
+    def reset(self):
+        """Forgets what was read, the next poll reads every database in full. Removed agents stay pending"""
+
+        with self._lock:
+            self._directory_mtime = None
+            for reader in (self.local_reader, *self._readers.values()):
+                reader.reset()
+
+    def live_readable(self) -> bool:
+        return self.local_reader.live_readable()
+
+
+syscheck_databases = SyscheckDatabases()
@@ -1,4 +1,5 @@
 import sys
+import threading
 from fastapi import templating, staticfiles
 import uvicorn, os, time
 from typing import Optional
@@ -23,8 +24,13 @@ from api.db.database import create_database
 from api.utils.loggers import create_logger
 from api.utils.log_streamer import log_streamer
 from api.utils.port_checker import find_free_port
+from api.utils.template_filters import TEMPLATE_FILTERS
 from api.v1.routes import v1_router
 from api.utils.settings import settings
+from api.v1.services.alert_hot_window import alert_hot_window
+from api.v1.services.ossec_rules import rules_catalogue
+from api.v1.services.monitored_file import MonitoredFileService
+from api.v1.services.path_tree import path_tree
 
 
 create_database()
@@ -34,6 +40,12 @@ logger = create_logger(__name__, log_file='logs/error.log')
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.HOT_WINDOW_ENABLED:
+        # Stats are answered by SQL until the window is loaded
+        threading.Thread(target=alert_hot_window.warm, daemon=True).start()
+    threading.Thread(target=rules_catalogue.watch, daemon=True).start()
+    threading.Thread(target=MonitoredFileService.watch, daemon=True).start()
+    threading.Thread(target=path_tree.warm, daemon=True).start()
     yield
 
 app = FastAPI(
@@ -56,6 +68,7 @@ app.mount(f'/{config("FILESTORAGE")}', StaticFiles(directory=FILESTORAGE), name=
 # Set up frontend templates
 frontend = templating.Jinja2Templates('frontend/app')
 frontend.env.globals['get_flashed_messages'] = get_flashed_messages
+frontend.env.filters.update(TEMPLATE_FILTERS)
 
 # Store frontend in app state for use in decorators
 app.state.frontend = frontend
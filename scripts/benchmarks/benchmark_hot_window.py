@@ -0,0 +1,136 @@
+"""
+Benchmark of the in-memory alert hot window against the equivalent SQL.
+
+Loads synthetic alerts spread over the last 24 hours into a temporary SQLite database,
+warms an `AlertHotWindow` from it and times the same questions both ways:
+a filtered count, the hourly severity histogram and the top hostnames.
+Results of both sides are compared before timing.
+
+Usage:
+    python3 scripts/benchmarks/benchmark_hot_window.py [alerts] [repeats]
+"""
+
+from datetime import datetime, timedelta
+import heapq
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+# ADD PROJECT ROOT TO IMPORT SEARCH SCOPE
+sys.path.append(str(ROOT_DIR))
+
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from api.db.database import Base
+from api.v1.models.alert import Alert
+from api.v1.services.alert_hot_window import AlertHotWindow
+from api.v1.services.alert_stats import SQLITE_BUCKET_FORMATS, AlertStatsService
+from api.v1.services.ossec import ossec_service
+
+
+def load_alerts(db: Session, count: int, now: datetime):
+    random.seed(0)
+    batch = []
+    for i in range(count):
+        level = random.randrange(16)
+        batch.append({
+            "unique_id": f"{i}.{i}",
+            "rule_id": str(5700 + random.randrange(200)),
+            "level": level,
+            "level_text": ossec_service.get_ossec_level_text(level),
+            "description": "sshd: authentication failed.",
+            "user": random.choice(["root", "admin", "www-data", None]),
+            "timestamp": now - timedelta(seconds=random.randrange(24 * 3600)),
+            "hostname": f"server-{random.randrange(50):02}",
+            "src_ip": f"10.0.{random.randrange(64)}.{random.randrange(256)}",
+        })
+        if len(batch) == 50_000:
+            db.execute(sa.insert(Alert), batch)
+            batch = []
+    if batch:
+        db.execute(sa.insert(Alert), batch)
+    db.commit()
+
+
+def sql_count(db: Session, start: datetime, severity: str) -> int:
+    return db.query(func.count()).filter(
+        Alert.is_deleted == False,
+        Alert.timestamp >= start,
+        Alert.level_text == severity,
+    ).scalar()
+
+
+def sql_histogram(db: Session, start: datetime, end: datetime):
+    bucket = func.strftime(SQLITE_BUCKET_FORMATS["hour"], Alert.timestamp).label("bucket")
+    rows = (
+        db.query(bucket, Alert.level_text, func.count())
+        .filter(Alert.is_deleted == False, Alert.timestamp >= start, Alert.timestamp < end)
+        .group_by(bucket, Alert.level_text)
+        .all()
+    )
+    counts = {}
+    for bucket_value, level_text, count in rows:
+        counts.setdefault(datetime.strptime(bucket_value, "%Y-%m-%d %H:%M:%S"), {})[level_text or "unknown"] = count
+    return counts
+
+
+def sql_top_hosts(db: Session, start: datetime, limit: int):
+    rows = (
+        db.query(Alert.hostname, func.count())
+        .filter(Alert.is_deleted == False, Alert.timestamp >= start, Alert.hostname.isnot(None))
+        .group_by(Alert.hostname)
+    )
+    return [{"value": value, "count": count} for value, count in heapq.nlargest(limit, rows, key=lambda row: row[1])]
+
+
+def run(label: str, func, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:<32} {elapsed * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = sa.create_engine(f"sqlite:///{os.path.join(directory, 'alerts.db')}")
+        Base.metadata.create_all(bind=engine)
+
+        now = datetime.now().replace(microsecond=0)
+        with Session(engine) as db:
+            print(f"Loading {count} alerts into SQLite...")
+            load_alerts(db, count, now)
+
+            window = AlertHotWindow(hours=25, max_alerts=count * 2)
+            started = time.perf_counter()
+            window.warm(db)
+            print(f"Hot window warmed with {len(window)} alerts in {time.perf_counter() - started:.2f}s\n")
+
+            start = AlertStatsService.floor_to_bucket(now - timedelta(hours=24), "hour")
+            end = now + timedelta(hours=1)
+            step = timedelta(hours=1)
+
+            assert window.count(start, severity="critical") == sql_count(db, start, "critical")
+            assert window.count_buckets(start, end, step) == sql_histogram(db, start, end)
+            # Ties may be ranked in a different order, the counts must match
+            assert [row["count"] for row in window.top("hostname", start, limit=10)] == \
+                [row["count"] for row in sql_top_hosts(db, start, 10)]
+
+            run("SQL count (critical, 24h)", lambda: sql_count(db, start, "critical"), repeats)
+            run("hot window count", lambda: window.count(start, severity="critical"), repeats)
+            run("SQL hourly histogram", lambda: sql_histogram(db, start, end), repeats)
+            run("hot window hourly histogram", lambda: window.count_buckets(start, end, step), repeats)
+            run("SQL top 10 hostnames", lambda: sql_top_hosts(db, start, 10), repeats)
+            run("hot window top 10 hostnames", lambda: window.top("hostname", start, limit=10), repeats)
+
+        engine.dispose()
@@ -0,0 +1,85 @@
+"""
+Benchmark of the memory-mapped reverse line reader against `readlines()` for tail-oriented reads.
+
+Writes a synthetic log of the given size into a temporary directory, then times reading the last
+100 lines and a page 10,000 lines from the end both ways. Results of both sides are compared before timing.
+`readlines()` is only run once, it holds the whole file in memory.
+
+Usage:
+    python3 scripts/benchmarks/benchmark_reverse_reader.py [size_mb] [repeats]
+"""
+
+from itertools import islice
+import os
+import pathlib
+import random
+import resource
+import sys
+import tempfile
+import time
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+# ADD PROJECT ROOT TO IMPORT SEARCH SCOPE
+sys.path.append(str(ROOT_DIR))
+
+from api.utils.reverse_reader import iter_lines_reversed
+
+
+def write_log(file_path: str, size: int):
+    random.seed(0)
+    levels = ["INFO", "WARNING", "ERROR"]
+    block = "".join(
+        f"2026-10-19 02:{i % 60:02}:{i % 60:02},{i % 1000:03} - {random.choice(levels)} - "
+        f"dashboard.py:dashboard:alerts: line {i % 500}:- GET /dashboard/alerts?page={i} 200 {'x' * random.randrange(80)}\n"
+        for i in range(10_000)
+    )
+    with open(file_path, "w") as f:
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+
+
+def readlines_tail(file_path: str, offset: int, limit: int):
+    with open(file_path, "r") as f:
+        lines = f.readlines()
+    return [line.strip() for line in lines[max(len(lines) - offset - limit, 0):len(lines) - offset]]
+
+
+def reversed_tail(file_path: str, offset: int, limit: int):
+    lines = list(islice(iter_lines_reversed(file_path, skip=offset), limit))
+    lines.reverse()
+    return [line.strip() for line in lines]
+
+
+def run(label: str, func, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:<36} {elapsed * 1000:>10.2f} ms")
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "app_logs.log")
+        print(f"Writing a {size_mb}MB log...")
+        write_log(file_path, size_mb * 1024 * 1024)
+
+        run("reverse reader last 100 lines", lambda: reversed_tail(file_path, 0, 100), repeats)
+        run("reverse reader 100 lines at -10000", lambda: reversed_tail(file_path, 10_000, 100), repeats)
+        print(f"{'max RSS after reverse reads':<36} {max_rss_mb():>10.0f} MB")
+
+        expected = reversed_tail(file_path, 10_000, 100)
+        started = time.perf_counter()
+        assert readlines_tail(file_path, 10_000, 100) == expected
+        print(f"{'readlines() 100 lines at -10000':<36} {(time.perf_counter() - started) * 1000:>10.2f} ms")
+        print(f"{'max RSS after readlines()':<36} {max_rss_mb():>10.0f} MB")
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for `BaseTableModel.to_dict`.
+
+Compares the previous `inspect.getmembers()` based serializer against the cached
+serializer plans on `Alert` rows loaded from an in-memory SQLite database.
+
+Usage:
+    python3 scripts/benchmarks/benchmark_serialization.py [rows]
+"""
+
+from datetime import datetime, timedelta
+from inspect import getmembers
+import pathlib
+import sys
+import time
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+# ADD PROJECT ROOT TO IMPORT SEARCH SCOPE
+sys.path.append(str(ROOT_DIR))
+
+import sqlalchemy as sa
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+
+from api.db.database import Base
+from api.v1.models.alert import Alert
+
+
+def legacy_to_dict(obj, excludes=[]):
+    """Serializer as it was before the serializer plans were introduced"""
+    
+    obj_dict = obj.__dict__.copy()
+    del obj_dict["_sa_instance_state"]
+    del obj_dict["is_deleted"]
+    obj_dict["id"] = obj.id
+    
+    if obj.created_at:
+        obj_dict["created_at"] = obj.created_at.isoformat()
+    if obj.updated_at:
+        obj_dict["updated_at"] = obj.updated_at.isoformat()
+        
+    for name, attr in getmembers(obj):
+        if isinstance(attr, hybrid_property):
+            obj_dict[name] = getattr(obj, name)
+            
+    for exclude in excludes:
+        if exclude in list(obj_dict.keys()):
+            obj_dict.pop(exclude, None)
+    
+    return obj_dict
+
+
+def load_alerts(rows: int):
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    
+    now = datetime.now()
+    with Session(engine) as db:
+        db.execute(
+            sa.insert(Alert),
+            [
+                {
+                    "unique_id": f"{i}.{i}",
+                    "rule_id": str(5700 + i % 20),
+                    "level": i % 16,
+                    "level_meaning": "Low relevance attack",
+                    "level_text": "moderate",
+                    "description": "sshd: authentication failed.",
+                    "user": "root",
+                    "timestamp": now - timedelta(seconds=i),
+                    "hostname": "server-01",
+                    "device_ip": "10.0.0.1",
+                    "log_file_path": "/var/log/auth.log",
+                    "log": "Failed password for root from 10.0.0.2 port 22 ssh2" * 4,
+                }
+                for i in range(rows)
+            ]
+        )
+        db.commit()
+    
+    db = Session(engine)
+    return db, db.query(Alert).all()
+
+
+def run(label: str, func, alerts):
+    start = time.perf_counter()
+    for alert in alerts:
+        func(alert)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:>10.1f} ms   {elapsed / len(alerts) * 1e6:>8.2f} us/row")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    db, alerts = load_alerts(rows)
+    
+    print(f"Serializing {len(alerts)} Alert rows")
+    run("legacy getmembers()", lambda alert: legacy_to_dict(alert, excludes=["log"]), alerts)
+    run("to_dict (serializer plan)", lambda alert: alert.to_dict(excludes=["log"]), alerts)
+    run("to_json", lambda alert: alert.to_json(excludes=["log"]), alerts)
+    
+    db.close()
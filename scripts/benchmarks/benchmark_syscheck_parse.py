@@ -0,0 +1,122 @@
+"""
+Benchmark of syscheck parsing: throughput and memory per record of `SyscheckRecord` against the former dict.
+
+Generates a synthetic syscheck database in memory (mixed statuses, some extended checksums and paths with spaces),
+then parses it both ways, timing the parse and measuring the memory the parsed records hold with tracemalloc.
+Throughput is also given with the garbage collector off, as its passes over the growing list of records weigh
+as much as the parse itself at a million lines. Both parsers are checked to agree on every record before timing.
+
+Usage:
+    python3 scripts/benchmarks/benchmark_syscheck_parse.py [records] [repeats]
+"""
+
+from datetime import datetime
+import gc
+import pathlib
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+# ADD PROJECT ROOT TO IMPORT SEARCH SCOPE
+sys.path.append(str(ROOT_DIR))
+
+from api.v1.services.ossec import DEFAULT_SYSCHECK_STATUS, SYSCHECK_RECORD_COLUMNS, SYSCHECK_STATUSES, parse_syscheck_line
+
+
+def parse_syscheck_line_dict(line: str):
+    """The former parser, building a dict per record"""
+
+    try:
+        status = line[:3]
+        rest = line[3:].strip()
+        meta_split = rest.split(" !", 1)
+        if len(meta_split) != 2:
+            return None
+        meta_fields = meta_split[0]
+        last_check_and_path = meta_split[1].strip()
+        last_check, *file_path_parts = last_check_and_path.split()
+        file_path = " ".join(file_path_parts)
+        meta_parts = meta_fields.split(":")
+        if len(meta_parts) < 6 or not file_path:
+            return None
+        size, mode, uid, gid, md5, sha1 = meta_parts[:6]
+        inode = meta_parts[9] if len(meta_parts) >= 10 else None
+        try:
+            last_check = datetime.fromtimestamp(int(last_check))
+        except ValueError:
+            last_check = None
+        return {
+            "path": file_path,
+            "status": SYSCHECK_STATUSES.get(status, DEFAULT_SYSCHECK_STATUS),
+            "size": int(size) if size.isdigit() else None,
+            "mode": int(mode) if mode.isdigit() else None,
+            "uid": int(uid) if uid.isdigit() else None,
+            "gid": int(gid) if gid.isdigit() else None,
+            "md5": md5,
+            "sha1": sha1,
+            "inode": int(inode) if inode and inode.isdigit() else None,
+            "last_check": last_check,
+        }
+    except Exception:
+        return None
+
+
+def generate_lines(count: int) -> list:
+    random.seed(0)
+    flags = ["+++", "+++", "+++", "...", "!++", "---", "!!!"]
+    lines = []
+    for i in range(count):
+        checksums = f"{random.randrange(1, 10**7)}:33188:0:0:{random.getrandbits(128):032x}:{random.getrandbits(160):040x}"
+        if i % 4 == 0:
+            checksums += f":root:root:{1700000000 + i}:{random.randrange(10**7)}"
+        name = f"file {i}.conf" if i % 50 == 0 else f"file_{i}.conf"
+        lines.append(f"{random.choice(flags)}{checksums} !{1700000000 + i} /etc/dir{i % 300}/sub{i % 17}/{name}")
+    return lines
+
+
+def best_time(parse, lines: list, repeats: int, collect: bool) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        if not collect:
+            gc.disable()
+        start = time.perf_counter()
+        records = [parse(line) for line in lines]
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+        del records
+    return best
+
+
+def run(label: str, parse, lines: list, repeats: int):
+    with_gc = best_time(parse, lines, repeats, collect=True)
+    without_gc = best_time(parse, lines, repeats, collect=False)
+
+    tracemalloc.start()
+    records = [parse(line) for line in lines]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+
+    print(
+        f"{label:<16} {len(lines) / with_gc / 1e6:>6.2f} M lines/s ({len(lines) / without_gc / 1e6:.2f} without gc)"
+        f"  {held / len(lines):>8.0f} bytes/record  {held / len(lines) * 1e6 / 1024 / 1024:>8.0f} MB per 1M records"
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"Generating {count} syscheck lines...")
+    lines = generate_lines(count)
+
+    for line in lines[:10_000]:
+        record, expected = parse_syscheck_line(line), parse_syscheck_line_dict(line)
+        assert record.path == expected["path"]
+        assert dict(zip(SYSCHECK_RECORD_COLUMNS, record.values())) == {c: expected[c] for c in SYSCHECK_RECORD_COLUMNS}
+
+    run("dict", parse_syscheck_line_dict, lines, repeats)
+    run("SyscheckRecord", parse_syscheck_line, lines, repeats)
@@ -30,3 +30,12 @@ for TARGET in "${TARGETS[@]}"; do
     echo "Warning: $TARGET does not exist, skipping."
   fi
 done
+
+# Read access to the live syscheck database through the ossec group, so the dashboard reads it without sudo.
+# Files OSSEC creates in the queue are group readable, so access survives the database being recreated.
+if getent group ossec > /dev/null; then
+  sudo usermod -aG ossec "$USERNAME"
+  sudo chmod g+rx /var/ossec/queue /var/ossec/queue/syscheck
+  sudo find /var/ossec/queue/syscheck -maxdepth 1 -type f -exec chmod g+r {} +
+  echo "✅ $USERNAME added to the ossec group for /var/ossec/queue/syscheck (log in again for it to apply)"
+fi
@@ -119,6 +119,7 @@ for entry in entries:
         "level_meaning": get_log_level_meaning(level),
         "description": description,
         "user": user or "root",
+        "src_ip": src_ip,
         "timestamp": timestamp,
         "hostname": hostname,
         "device_ip": device_ip,
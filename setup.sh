@@ -44,7 +44,8 @@ chmod +x start.sh
 
 # === 3️⃣ Add cron job (run every minute) ===
 (crontab -l 2>/dev/null | grep -v "$INSTALL_DIR/scripts/sync_ossec_alerts.sh" ; echo "* * * * * /bin/bash $INSTALL_DIR/scripts/sync_ossec_alerts.sh >> /tmp/ossec_cron.log 2>&1") | crontab -
-(crontab -l 2>/dev/null | grep -v "$INSTALL_DIR/scripts/sync_monitored_files.sh" ; echo "* * * * * /bin/bash $INSTALL_DIR/scripts/sync_monitored_files.sh >> /tmp/ossec_cron.log 2>&1") | crontab -
+# The dashboard reads the live syscheck database itself, drop the snapshot job of earlier installs
+(crontab -l 2>/dev/null | grep -v "$INSTALL_DIR/scripts/sync_monitored_files.sh") | crontab -
 
 echo "✅ ossec-dashboard setup complete!"
 echo "📂 Installed in: $INSTALL_DIR"
@@ -54,6 +55,9 @@ echo "🕒 Cron job added (runs every minute). Check logs: tail -f /tmp/ossec_cr
 mkdir -p logs
 touch logs/app_logs.log
 
+echo "🔄 Applying database migrations..."
+alembic upgrade head
+
 echo "🔄 Starting ossec-dashboard..."
 python3 main.py
 